@@ -1,36 +1,77 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, Response, g
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import closing
 from datetime import datetime, timedelta, timezone
-from functools import wraps
+from functools import lru_cache, wraps
+import asyncio
+import hashlib
+import heapq
 import sqlite3
 import os
 import json
+import threading
 import time
+import traceback
 import io
 import re
+import sys
+
+# Optional fast JSON (5-10x faster than stdlib on big nested configs); stdlib json is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # PostgreSQL support
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_values
     POSTGRESQL_AVAILABLE = True
 except ImportError:
     POSTGRESQL_AVAILABLE = False
 
-# Google OAuth imports
-try:
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import Flow
-    from googleapiclient.discovery import build
-    
-    # Configure OAuth for Railway's proxy environment
-    if 'RAILWAY_ENVIRONMENT' in os.environ:
-        os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
-    
-    GOOGLE_OAUTH_AVAILABLE = True
-except ImportError:
+# Google OAuth imports (lazy). googleapiclient in particular is expensive to
+# import, so availability is detected without importing anything and the real
+# modules load on first OAuth/Drive use — cuts worker cold-start time for the
+# many routes that never touch Google.
+import importlib.util
+
+def _module_available(mod):
+    # find_spec raises ModuleNotFoundError (rather than returning None) when a
+    # parent package like 'google' is missing entirely.
+    try:
+        return importlib.util.find_spec(mod) is not None
+    except ModuleNotFoundError:
+        return False
+
+GOOGLE_OAUTH_AVAILABLE = all(
+    _module_available(mod)
+    for mod in ('google.auth', 'google.oauth2', 'google_auth_oauthlib', 'googleapiclient')
+)
+if not GOOGLE_OAUTH_AVAILABLE:
     print("⚠️  Warning: Google OAuth libraries not found. Admin authentication will be disabled.")
-    GOOGLE_OAUTH_AVAILABLE = False
+elif 'RAILWAY_ENVIRONMENT' in os.environ:
+    # Configure OAuth for Railway's proxy environment
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+
+Request = Credentials = Flow = build = None
+
+def _ensure_google_oauth():
+    """Import the Google OAuth/Drive stack on first use. Returns availability."""
+    global Request, Credentials, Flow, build, GOOGLE_OAUTH_AVAILABLE
+    if build is not None or not GOOGLE_OAUTH_AVAILABLE:
+        return GOOGLE_OAUTH_AVAILABLE
+    try:
+        from google.auth.transport.requests import Request as _Request
+        from google.oauth2.credentials import Credentials as _Credentials
+        from google_auth_oauthlib.flow import Flow as _Flow
+        from googleapiclient.discovery import build as _build
+    except ImportError:
+        GOOGLE_OAUTH_AVAILABLE = False
+        return False
+    Request, Credentials, Flow, build = _Request, _Credentials, _Flow, _build
+    return True
 
 # Load environment variables from .env file
 try:
@@ -51,23 +92,29 @@ except ImportError:
             path = os.path.join(base_dir, filename)
             if not os.path.exists(path):
                 return
+            # Read the whole file in one shot and apply all new vars with a
+            # single os.environ.update() instead of per-line writes.
             with open(path, 'r', encoding='utf-8') as f:
-                for raw_line in f:
-                    line = raw_line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    if '=' not in line:
-                        continue
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if not key:
-                        continue
-                    # Strip surrounding quotes
-                    if len(value) >= 2 and ((value[0] == value[-1]) and value[0] in ("'", '"')):
-                        value = value[1:-1]
-                    if key not in os.environ:
-                        os.environ[key] = value
+                content = f.read()
+            new_vars = {}
+            for line in content.split('\n'):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if '=' not in line:
+                    continue
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip()
+                if not key:
+                    continue
+                # Strip surrounding quotes
+                if len(value) >= 2 and ((value[0] == value[-1]) and value[0] in ("'", '"')):
+                    value = value[1:-1]
+                if key not in os.environ:
+                    new_vars[key] = value
+            if new_vars:
+                os.environ.update(new_vars)
         except Exception:
             # Best-effort; ignore parsing errors
             return
@@ -78,19 +125,105 @@ try:
     from groq import Groq
 except (ImportError, Exception):
     Groq = None
+try:
+    from groq import AsyncGroq
+except (ImportError, Exception):
+    AsyncGroq = None
+try:
+    from groq import RateLimitError as GroqRateLimitError
+except (ImportError, Exception):
+    GroqRateLimitError = None
 try:
     import google.generativeai as genai
 except (ImportError, Exception):
     genai = None
 
+@lru_cache(maxsize=1)
+def _get_groq_client():
+    """Process-wide Groq client.
+
+    The client wraps an httpx connection pool; constructing one per call
+    throws the pooled TLS connections away. The API key and timeout are read
+    once per process (restart to apply a changed llm_request_timeout) —
+    callers still gate on their own key checks. The SDK retries timeouts and
+    connection errors itself (max_retries defaults to 2).
+    """
+    key = os.environ.get('GROQ_API_KEY')
+    if not key or Groq is None:
+        return None
+    return Groq(api_key=key, timeout=_llm_timeout())
+
+@lru_cache(maxsize=2)
+def _get_gemini_model(model_name='gemini-pro'):
+    """Process-wide Gemini model handle.
+
+    genai.configure() only needs to run once per process, and the model
+    object holds the underlying transport channel — rebuilding both per
+    request redoes that setup every call. Callers still gate on their own
+    key checks.
+    """
+    key = os.getenv('GOOGLE_API_KEY')
+    if not key or genai is None:
+        return None
+    genai.configure(api_key=key)
+    return genai.GenerativeModel(model_name)
+
+def _llm_timeout():
+    """Per-request LLM timeout in seconds (llm_request_timeout setting, default 20)."""
+    try:
+        return float(get_setting('llm_request_timeout', '20') or 20)
+    except Exception:
+        return 20.0
+
+# Side executor that runs Gemini calls so their wait can be bounded; the
+# threads are cheap next to a gunicorn worker pinned on a stuck upstream call.
+_GEMINI_EXEC = ThreadPoolExecutor(max_workers=4, thread_name_prefix='gemini')
+
+def _gemini_generate_text(model, prompt, generation_config=None):
+    """model.generate_content with a hard deadline and one retry on timeout.
+
+    This SDK version has no request timeout, so the tail of slow Gemini calls
+    can run to minutes. The call runs on _GEMINI_EXEC and is abandoned after
+    _llm_timeout() seconds, retried once, then the TimeoutError propagates to
+    the caller's normal provider-error handling. The abandoned call itself
+    can't be cancelled, but the request thread is freed.
+    """
+    timeout = _llm_timeout()
+    for attempt in (0, 1):
+        future = _GEMINI_EXEC.submit(model.generate_content, prompt, generation_config=generation_config)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if attempt:
+                raise
+try:
+    from flask_compress import Compress
+except (ImportError, Exception):
+    Compress = None
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here-change-in-production')
 app.config['SESSION_COOKIE_SECURE'] = os.getenv('RAILWAY_ENVIRONMENT') is not None
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# Compress JSON/markdown responses when flask-compress is installed. Notes and
+# study-plan payloads are multi-KB and highly redundant, so wire bytes drop
+# substantially at negligible CPU cost.
+if Compress is not None:
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 4
+    Compress(app)
+
+# Env vars don't change mid-process, so raw os.getenv() lookups can be cached.
+_ENV_CACHE = {}
+
 def _env_truthy(name, default=None):
-    v = os.getenv(name)
+    if name in _ENV_CACHE:
+        v = _ENV_CACHE[name]
+    else:
+        v = _ENV_CACHE[name] = os.getenv(name)
     if v is None:
         return default
     v = str(v).strip().lower()
@@ -100,22 +233,31 @@ def _env_truthy(name, default=None):
         return False
     return default
 
+def ojsonify(obj):
+    """jsonify drop-in that serializes with orjson when available.
+
+    Used on the larger payloads (study plans, notes markdown) where stdlib
+    json's ensure_ascii escaping costs both CPU and wire bytes.
+    """
+    if orjson is None:
+        return jsonify(obj)
+    return Response(orjson.dumps(obj), mimetype='application/json')
+
+# Env vars never change after process start; read these once instead of
+# hitting os.environ on every request.
+_DRIVE_OVERRIDE = _env_truthy('DRIVE_FEATURE_ENABLED', default=None)
+_IS_RAILWAY = os.getenv('RAILWAY_ENVIRONMENT') is not None
+
 def drive_feature_enabled():
     """
     Drive integration is SECURITY-SENSITIVE. Default behavior:
     - Enabled on localhost only
     - Disabled on deployed environments unless explicitly enabled via DRIVE_FEATURE_ENABLED=1
     """
-    override = _env_truthy('DRIVE_FEATURE_ENABLED', default=None)
-    if override is not None:
-        return bool(override)
+    if _DRIVE_OVERRIDE is not None:
+        return bool(_DRIVE_OVERRIDE)
     # Default: only allow on localhost (prevents accidental exposure on deploy even if RAILWAY_ENVIRONMENT isn't set).
-    try:
-        host = (request.host or '').split(':')[0].lower()
-        return host in ('localhost', '127.0.0.1')
-    except Exception:
-        # Outside request context: safest default is disabled.
-        return False
+    return _is_local_request()
 
 # Database configuration
 # Use Railway's DATABASE_URL if available (PostgreSQL), otherwise use local SQLite
@@ -149,7 +291,7 @@ if GOOGLE_OAUTH_AVAILABLE:
     OAUTH_CONFIGURED = bool(GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET)
     
     # OAuth scopes
-    SCOPES = ['openid', 'https://www.googleapis.com/auth/userinfo.email', 'https://www.googleapis.com/auth/userinfo.profile']
+    SCOPES = ('openid', 'https://www.googleapis.com/auth/userinfo.email', 'https://www.googleapis.com/auth/userinfo.profile')
     DRIVE_READONLY_SCOPE = 'https://www.googleapis.com/auth/drive.readonly'
     
     # OAuth flow configuration
@@ -167,39 +309,159 @@ else:
     GOOGLE_CLIENT_SECRET = None
     ADMIN_EMAILS = []
     OAUTH_CONFIGURED = False
-    SCOPES = []
+    SCOPES = ()
     DRIVE_READONLY_SCOPE = None
     CLIENT_CONFIG = None
 
+# Normalized once at startup; is_admin_email runs on every protected route and
+# shouldn't rebuild the lowercased list each time.
+_ADMIN_EMAILS_SET = frozenset(a.strip().lower() for a in ADMIN_EMAILS if a.strip())
+
+# The app only ever uses these two scope sets; keep them as shared tuples and
+# precompute their storage keys so _scopes_key is an identity check on the hot paths.
+DRIVE_SCOPES = (SCOPES + (DRIVE_READONLY_SCOPE,)) if DRIVE_READONLY_SCOPE else SCOPES
+_SCOPES_KEY = ' '.join(sorted(set(SCOPES)))
+_DRIVE_SCOPES_KEY = ' '.join(sorted(set(DRIVE_SCOPES)))
+
+_LOCAL_HOSTS = frozenset({'localhost', '127.0.0.1'})
+
 def _is_local_request():
     """
     Local dev detection for admin convenience.
     IMPORTANT: we never want to accidentally treat a deployed host as local.
     """
+    # Called several times per request through the decorator stack; the host
+    # can't change mid-request, so cache the answer on flask.g.
     try:
-        host = (request.host or '').split(':')[0].lower()
-        return host in ('localhost', '127.0.0.1')
+        cached = getattr(g, '_is_local_request', None)
+        if cached is None:
+            cached = g._is_local_request = (request.host or '').partition(':')[0].lower() in _LOCAL_HOSTS
+        return cached
     except Exception:
         return False
 
+# PostgreSQL connection pool: opening a fresh TCP/TLS connection per request is
+# far more expensive than the queries themselves on a managed DB.
+_PG_POOL = None
+_PG_POOL_LOCK = threading.Lock()
+
+def _get_pg_pool():
+    global _PG_POOL
+    if _PG_POOL is None:
+        with _PG_POOL_LOCK:
+            if _PG_POOL is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                max_conns = int(os.getenv('PG_POOL_MAX_CONNECTIONS', '20'))
+                _PG_POOL = ThreadedConnectionPool(1, max_conns, DATABASE_URL)
+    return _PG_POOL
+
+class _PooledConnection:
+    """
+    Wraps a pooled psycopg2 connection so the existing `conn.close()` call sites
+    return it to the pool instead of tearing it down.
+    """
+    __slots__ = ('_conn', '_pool', '_closed')
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Discard any uncommitted transaction state before reuse
+            # (same visible behavior as closing a raw connection).
+            self._conn.rollback()
+            self._pool.putconn(self._conn)
+        except Exception:
+            try:
+                self._pool.putconn(self._conn, close=True)
+            except Exception:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+# SQLite connection reuse: each thread keeps one open connection (PRAGMAs run
+# once at open) instead of reconnecting and re-issuing them on every get_db().
+_SQLITE_LOCAL = threading.local()
+
+class _ThreadLocalConnection:
+    """
+    Wraps the thread-cached sqlite3 connection so the existing `conn.close()`
+    call sites release it for reuse (rolling back, same visible behavior as
+    closing a raw connection) instead of tearing it down.
+    """
+    __slots__ = ('_conn', '_closed')
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.rollback()
+            _SQLITE_LOCAL.in_use = False
+        except Exception:
+            # Connection is broken; drop it so the next get_db() reopens.
+            _SQLITE_LOCAL.conn = None
+            _SQLITE_LOCAL.in_use = False
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def _open_sqlite_connection():
+    # Reduce "database is locked" errors (common under Flask reloader)
+    conn = sqlite3.connect(DATABASE, timeout=30, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # Write transactions open with BEGIN IMMEDIATE so the write lock is taken
+    # upfront instead of on upgrade mid-transaction (the common SQLITE_BUSY
+    # path under concurrent handlers). SELECTs stay autocommit.
+    conn.isolation_level = 'IMMEDIATE'
+    # Connection-local PRAGMAs only; journal_mode=WAL persists on disk and is
+    # set once in init_db(). These run once per thread thanks to connection reuse.
+    try:
+        conn.execute('PRAGMA foreign_keys=ON;')
+        conn.execute('PRAGMA synchronous=NORMAL;')
+        conn.execute('PRAGMA busy_timeout=30000;')
+        conn.execute('PRAGMA temp_store=MEMORY;')
+        conn.execute('PRAGMA cache_size=-65536;')      # 64MB page cache
+        conn.execute('PRAGMA mmap_size=268435456;')    # mmap reads, fewer syscalls
+    except Exception:
+        pass
+    return conn
+
 def get_db():
     """Get database connection - supports both SQLite and PostgreSQL"""
     if USE_POSTGRESQL:
         if not POSTGRESQL_AVAILABLE:
             raise Exception("PostgreSQL URL provided but psycopg2 not installed. Run: pip install psycopg2-binary")
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
+        pool = _get_pg_pool()
+        return _PooledConnection(pool.getconn(), pool)
     else:
-        # Reduce "database is locked" errors (common under Flask reloader)
-        conn = sqlite3.connect(DATABASE, timeout=30)
-        conn.row_factory = sqlite3.Row
-        try:
-            conn.execute('PRAGMA foreign_keys=ON;')
-            conn.execute('PRAGMA journal_mode=WAL;')
-            conn.execute('PRAGMA synchronous=NORMAL;')
-            conn.execute('PRAGMA busy_timeout=30000;')
-        except Exception:
-            pass
+        cached = getattr(_SQLITE_LOCAL, 'conn', None)
+        if cached is not None and not getattr(_SQLITE_LOCAL, 'in_use', False):
+            _SQLITE_LOCAL.in_use = True
+            return _ThreadLocalConnection(cached)
+        conn = _open_sqlite_connection()
+        if cached is None:
+            # First connection on this thread: cache it for reuse.
+            _SQLITE_LOCAL.conn = conn
+            _SQLITE_LOCAL.in_use = True
+            return _ThreadLocalConnection(conn)
+        # Nested get_db() while the cached connection is lent out (a handler
+        # holding its connection calls a helper that opens its own): hand back
+        # a plain one-shot connection whose close() really closes.
         return conn
 
 def db_execute(conn, query, params=None):
@@ -214,6 +476,20 @@ def db_execute(conn, query, params=None):
     else:
         return conn.execute(query, params or ())
 
+def db_col(row, idx, name):
+    """Extract one column from a fetched row - works with both SQLite and PostgreSQL.
+
+    sqlite3.Row and plain tuples (the prepared-statement cursors) take the
+    positional index; RealDictRow raises KeyError on it and falls through to
+    the column name. No intermediate dict() copies either way.
+    """
+    if row is None:
+        return None
+    try:
+        return row[idx]
+    except (TypeError, KeyError, IndexError):
+        return row[name]
+
 def db_fetchone(cursor):
     """Fetch one row - works with both SQLite and PostgreSQL"""
     if USE_POSTGRESQL:
@@ -228,21 +504,36 @@ def db_fetchall(cursor):
     else:
         return cursor.fetchall()
 
-def db_lastrowid(cursor, conn):
-    """Get last inserted row ID - works with both SQLite and PostgreSQL"""
+def db_execute_returning_id(conn, query, params):
+    """Run an INSERT and return the new row id - works with both SQLite and PostgreSQL.
+
+    Appends RETURNING id on PostgreSQL (so callers write one engine-neutral
+    statement and can't forget the clause) and uses lastrowid on SQLite.
+    Inserts that don't need the id should use db_execute directly.
+    """
     if USE_POSTGRESQL:
-        # For PostgreSQL with RETURNING clause, fetch from cursor
-        if cursor.rowcount > 0:
-            result = cursor.fetchone()
-            return result['id'] if result else None
-        return None
-    else:
-        return cursor.lastrowid
+        cursor = db_execute(conn, query + ' RETURNING id', params)
+        row = cursor.fetchone()
+        cursor.close()
+        return row['id'] if row else None
+    return db_execute(conn, query, params).lastrowid
+
+# Bump whenever init_db() gains tables, columns or indexes so existing
+# databases re-run the DDL pass exactly once.
+_SCHEMA_VERSION = 4
 
 def init_db():
     """Initialize database tables - supports both SQLite and PostgreSQL"""
+    # Skip the ~25 CREATE TABLE / ALTER TABLE probes (full catalog scans on PG)
+    # when the stored schema version already matches.
+    try:
+        if get_setting('schema_version') == str(_SCHEMA_VERSION):
+            return
+    except Exception:
+        pass
+
     conn = get_db()
-    
+
     # Determine ID column syntax based on database type
     if USE_POSTGRESQL:
         id_col = "id SERIAL PRIMARY KEY"
@@ -252,7 +543,19 @@ def init_db():
         id_col = "id INTEGER PRIMARY KEY AUTOINCREMENT"
         foreign_key_syntax = "FOREIGN KEY (interview_id) REFERENCES interviews (id)"
         cursor = conn.cursor()
-    
+        # WAL is a persistent, database-wide setting — flip it once here rather
+        # than on every connection open.
+        try:
+            cursor.execute('PRAGMA journal_mode=WAL;')
+        except Exception:
+            pass
+
+    # Regenerable tables (AI caches, Drive index, refreshable OAuth tokens) skip
+    # the write-ahead log on PostgreSQL: UNLOGGED cuts write overhead markedly,
+    # at the cost that a PG crash empties them (caches refill, users re-login).
+    # Core data (interviews, topics, sessions, settings) stays logged.
+    cache_table = 'UNLOGGED TABLE' if USE_POSTGRESQL else 'TABLE'
+
     # Create interviews table
     cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS interviews (
@@ -280,41 +583,49 @@ def init_db():
             {foreign_key_syntax}
         )
     ''')
-    
+
+    # Composite index matching the study-plan/interview ORDER BY, so listing an
+    # interview's topics is an index scan instead of a full sort. The COALESCE
+    # expression mirrors the queries exactly (both engines support expression
+    # indexes); best-effort for old SQLite builds without them.
+    try:
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_topics_order
+            ON topics(interview_id, COALESCE(category_name, ''), priority DESC, topic_name)
+        ''')
+        # Narrow index for the list-page aggregate (count topics / completed
+        # topics per interview) so it never touches the wide topic rows.
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_topics_interview_status
+            ON topics(interview_id, status)
+        ''')
+    except Exception:
+        pass
+
     # Add columns if they don't exist (for existing databases)
     if USE_POSTGRESQL:
-        # PostgreSQL: Check if column exists before adding
-        try:
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='topics' AND column_name='ai_guidance'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE topics ADD COLUMN ai_guidance TEXT')
-        except Exception:
-            pass  # Column already exists or error
-        
-        try:
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='topics' AND column_name='category_name'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE topics ADD COLUMN category_name TEXT')
-        except Exception:
-            pass  # Column already exists or error
+        # PostgreSQL: fetch every (table, column) pair in one roundtrip instead
+        # of probing information_schema once per column (each probe is a full
+        # network RTT on Railway). Tables absent from the result are being
+        # created fresh this run and already have every column.
         try:
             cursor.execute("""
-                SELECT column_name
+                SELECT table_name, column_name
                 FROM information_schema.columns
-                WHERE table_name='topics' AND column_name='ai_notes'
+                WHERE table_schema = 'public'
+                  AND table_name IN ('topics', 'drive_files', 'drive_guides')
             """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE topics ADD COLUMN ai_notes TEXT')
+            pg_existing_columns = {(row['table_name'], row['column_name']) for row in cursor.fetchall()}
         except Exception:
-            pass
+            pg_existing_columns = set()
+        pg_existing_tables = {t for t, _ in pg_existing_columns}
+        if 'topics' in pg_existing_tables:
+            for column in ('ai_guidance', 'category_name', 'ai_notes'):
+                if ('topics', column) not in pg_existing_columns:
+                    try:
+                        cursor.execute(f'ALTER TABLE topics ADD COLUMN {column} TEXT')
+                    except Exception:
+                        pass  # Column already exists or error
     else:
         # SQLite: Try to add, ignore if exists
         try:
@@ -355,7 +666,7 @@ def init_db():
 
     # OAuth token store (server-side; avoids cookie session limits)
     cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS oauth_tokens (
+        CREATE {cache_table} IF NOT EXISTS oauth_tokens (
             email TEXT NOT NULL,
             scopes_key TEXT NOT NULL,
             token_json TEXT NOT NULL,
@@ -366,7 +677,7 @@ def init_db():
 
     # Drive file index + extracted topics (for incremental processing)
     cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS drive_files (
+        CREATE {cache_table} IF NOT EXISTS drive_files (
             file_id TEXT PRIMARY KEY,
             folder_id TEXT,
             name TEXT,
@@ -382,6 +693,16 @@ def init_db():
         )
     ''')
 
+    # drive_extract_topics selects per folder ordered by recency; without this
+    # the query scans the whole table.
+    try:
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_drive_files_folder
+            ON drive_files(folder_id, indexed_at DESC)
+        ''')
+    except Exception:
+        pass
+
     # Add folder_id column if missing (existing DBs)
     if not USE_POSTGRESQL:
         try:
@@ -393,26 +714,13 @@ def init_db():
         except sqlite3.OperationalError:
             pass
     else:
-        try:
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name='drive_files' AND column_name='folder_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE drive_files ADD COLUMN folder_id TEXT')
-        except Exception:
-            pass
-        try:
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name='drive_files' AND column_name='text_excerpt'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE drive_files ADD COLUMN text_excerpt TEXT')
-        except Exception:
-            pass
+        if 'drive_files' in pg_existing_tables:
+            for column in ('folder_id', 'text_excerpt'):
+                if ('drive_files', column) not in pg_existing_columns:
+                    try:
+                        cursor.execute(f'ALTER TABLE drive_files ADD COLUMN {column} TEXT')
+                    except Exception:
+                        pass
 
     # Drive-generated study guides (e.g., concise master doc)
     cursor.execute(f'''
@@ -437,30 +745,17 @@ def init_db():
         except sqlite3.OperationalError:
             pass
     else:
-        try:
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name='drive_guides' AND column_name='folder_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE drive_guides ADD COLUMN folder_id TEXT')
-        except Exception:
-            pass
-        try:
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name='drive_guides' AND column_name='file_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute('ALTER TABLE drive_guides ADD COLUMN file_id TEXT')
-        except Exception:
-            pass
+        if 'drive_guides' in pg_existing_tables:
+            for column in ('folder_id', 'file_id'):
+                if ('drive_guides', column) not in pg_existing_columns:
+                    try:
+                        cursor.execute(f'ALTER TABLE drive_guides ADD COLUMN {column} TEXT')
+                    except Exception:
+                        pass
 
     # Optional cache of per-topic concise summaries to avoid regenerating repeatedly
     cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS drive_topic_summaries (
+        CREATE {cache_table} IF NOT EXISTS drive_topic_summaries (
             topic_key TEXT PRIMARY KEY,
             summary_markdown TEXT,
             updated_at TEXT
@@ -505,10 +800,26 @@ def init_db():
         # PostgreSQL migrations are best-effort; if table exists but columns missing, ignore.
         pass
 
+    # Latest-deck lookups filter on kind plus folder_id or file_id and take the
+    # newest row; these let the planner walk an index backwards for LIMIT 1
+    # instead of scanning and sorting every deck. Best-effort, same as
+    # idx_topics_order above.
+    try:
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_decks_kind_folder_created
+            ON drive_flashcard_decks(kind, folder_id, created_at DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_decks_kind_file_created
+            ON drive_flashcard_decks(kind, file_id, created_at DESC)
+        ''')
+    except Exception:
+        pass
+
     # Global AI guidance cache (reusable across interviews)
     # Keys are normalized to maximize cache hits and avoid duplicate regeneration.
     cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS ai_guidance_cache (
+        CREATE {cache_table} IF NOT EXISTS ai_guidance_cache (
             {id_col},
             position_key TEXT,
             topic_key TEXT,
@@ -523,7 +834,7 @@ def init_db():
 
     # Global Study Notes cache (compiled/curated format, reusable across interviews)
     cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS study_notes_cache (
+        CREATE {cache_table} IF NOT EXISTS study_notes_cache (
             {id_col},
             position_key TEXT,
             topic_key TEXT,
@@ -535,17 +846,139 @@ def init_db():
             UNIQUE(position_key, topic_key, topic_path_key)
         )
     ''')
-    
+
+    # AI-generated common topic lists per position (survives restarts, shared
+    # across workers — the in-process cache in generate_common_topics does not)
+    cursor.execute(f'''
+        CREATE {cache_table} IF NOT EXISTS common_topics_cache (
+            {id_col},
+            position_key TEXT,
+            topics_json TEXT,
+            updated_at TEXT,
+            UNIQUE(position_key)
+        )
+    ''')
+
+    # AI topic-extraction results keyed by content hash: re-extracting an
+    # unchanged file costs a DB read instead of an LLM call.
+    cursor.execute(f'''
+        CREATE {cache_table} IF NOT EXISTS ai_topic_cache (
+            content_key TEXT PRIMARY KEY,
+            topics_json TEXT,
+            created_at TEXT
+        )
+    ''')
+
     conn.commit()
+
+    # Existing PostgreSQL deployments: flip already-created cache tables to
+    # UNLOGGED (no-op if they already are; best-effort like the column probes).
+    # Runs after the commit above so a failed ALTER can't roll back the DDL.
+    if USE_POSTGRESQL:
+        for table in ('oauth_tokens', 'drive_files', 'drive_topic_summaries',
+                      'ai_guidance_cache', 'study_notes_cache', 'common_topics_cache',
+                      'ai_topic_cache'):
+            try:
+                cursor.execute(f'ALTER TABLE {table} SET UNLOGGED')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+
+        # Covering indexes so the hot lookups (filter columns + payload) are
+        # satisfied by index-only scans with no heap visit.
+        for stmt in (
+            '''CREATE INDEX IF NOT EXISTS ai_guidance_cache_lookup_idx
+               ON ai_guidance_cache (position_key, topic_key, topic_path_key) INCLUDE (ai_guidance)''',
+            '''CREATE INDEX IF NOT EXISTS study_notes_cache_lookup_idx
+               ON study_notes_cache (position_key, topic_key, topic_path_key) INCLUDE (notes_markdown)''',
+            '''CREATE INDEX IF NOT EXISTS oauth_tokens_lookup_idx
+               ON oauth_tokens (email, scopes_key) INCLUDE (token_json)''',
+            '''CREATE INDEX IF NOT EXISTS app_settings_lookup_idx
+               ON app_settings (key) INCLUDE (value)''',
+        ):
+            try:
+                cursor.execute(stmt)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+
     cursor.close()
     conn.close()
 
+    # Record the version so subsequent boots skip the DDL pass entirely.
+    try:
+        set_setting('schema_version', _SCHEMA_VERSION)
+    except Exception:
+        pass
+
+# Server-side prepared statements for the PostgreSQL hot-read helpers: the
+# same SQL runs thousands of times with varying params, and psycopg2 otherwise
+# re-parses and re-plans each call. Statements live per physical connection,
+# so they are prepared lazily the first time each pooled session needs one.
+_PG_PREPARED_STATEMENTS = {
+    'get_setting_stmt': '''
+        PREPARE get_setting_stmt (text) AS
+        SELECT value FROM app_settings WHERE key = $1 LIMIT 1
+    ''',
+    'get_token_stmt': '''
+        PREPARE get_token_stmt (text, text) AS
+        SELECT token_json FROM oauth_tokens WHERE email = $1 AND scopes_key = $2 LIMIT 1
+    ''',
+    'get_ai_guidance_stmt': '''
+        PREPARE get_ai_guidance_stmt (text, text, text) AS
+        SELECT ai_guidance FROM ai_guidance_cache
+        WHERE position_key = $1 AND topic_key = $2 AND topic_path_key = $3 LIMIT 1
+    ''',
+    'get_study_notes_stmt': '''
+        PREPARE get_study_notes_stmt (text, text, text) AS
+        SELECT notes_markdown FROM study_notes_cache
+        WHERE position_key = $1 AND topic_key = $2 AND topic_path_key = $3 LIMIT 1
+    ''',
+    'hydrate_topic_ai_stmt': '''
+        PREPARE hydrate_topic_ai_stmt (text, text, int) AS
+        UPDATE topics
+        SET ai_guidance = COALESCE($1, ai_guidance),
+            ai_notes   = COALESCE($2, ai_notes)
+        WHERE id = $3
+    ''',
+    'fetch_latest_deck_stmt': '''
+        PREPARE fetch_latest_deck_stmt (text, text, text) AS
+        SELECT id, folder_id, file_id, kind, deck_json, created_at
+        FROM drive_flashcard_decks
+        WHERE ($1 IS NULL OR kind = $1)
+          AND ($2 IS NULL OR folder_id = $2)
+          AND ($3 IS NULL OR file_id = $3)
+        ORDER BY created_at DESC
+        LIMIT 1
+    ''',
+}
+
+def _pg_execute_prepared(conn, name, params):
+    """EXECUTE a named prepared statement, preparing it on first use per session.
+
+    Only safe on a connection the caller owns outright (the read helpers all
+    open their own), since the first-use retry rolls back the transaction.
+    Uses a plain tuple cursor — callers index rows positionally, with no
+    RealDictCursor dict materialization per row.
+    """
+    placeholders = ', '.join(['%s'] * len(params))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'EXECUTE {name} ({placeholders})', params)
+    except psycopg2.Error:
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute(_PG_PREPARED_STATEMENTS[name])
+        cursor.execute(f'EXECUTE {name} ({placeholders})', params)
+    return cursor
+
+@lru_cache(maxsize=256)
 def get_setting(key, default=None):
-    """Get a setting value from DB (string)."""
+    """Get a setting value from DB (string). Memoized; set_setting invalidates."""
     try:
         conn = get_db()
         if USE_POSTGRESQL:
-            cursor = db_execute(conn, 'SELECT value FROM app_settings WHERE key = %s LIMIT 1', (key,))
+            cursor = _pg_execute_prepared(conn, 'get_setting_stmt', (key,))
             row = db_fetchone(cursor)
             cursor.close()
         else:
@@ -554,7 +987,7 @@ def get_setting(key, default=None):
         conn.close()
         if not row:
             return default
-        return dict(row).get('value') if USE_POSTGRESQL else row[0]
+        return row[0]
     except Exception:
         return default
 
@@ -581,11 +1014,19 @@ def set_setting(key, value):
         ''', (key, str(value), updated_at))
     conn.commit()
     conn.close()
+    get_setting.cache_clear()
+
+@lru_cache(maxsize=32)
+def _scopes_key_for(scopes_tuple):
+    return ' '.join(sorted(set(scopes_tuple)))
 
 def _scopes_key(scopes):
     """Stable key for token storage."""
-    uniq = sorted(set(scopes or []))
-    return ' '.join(uniq)
+    if scopes is SCOPES:
+        return _SCOPES_KEY
+    if scopes is DRIVE_SCOPES:
+        return _DRIVE_SCOPES_KEY
+    return _scopes_key_for(tuple(scopes or ()))
 
 def _get_token_json(email, scopes):
     """Fetch token JSON for a user+scopes from DB."""
@@ -595,13 +1036,13 @@ def _get_token_json(email, scopes):
     key = _scopes_key(scopes)
     try:
         if USE_POSTGRESQL:
-            cursor = db_execute(conn, 'SELECT token_json FROM oauth_tokens WHERE email = %s AND scopes_key = %s LIMIT 1', (email, key))
+            cursor = _pg_execute_prepared(conn, 'get_token_stmt', (email, key))
             row = db_fetchone(cursor)
             cursor.close()
             conn.close()
             if not row:
                 return None
-            return dict(row).get('token_json')
+            return row[0]
         else:
             cursor = db_execute(conn, 'SELECT token_json FROM oauth_tokens WHERE email = ? AND scopes_key = ? LIMIT 1', (email, key))
             row = db_fetchone(cursor)
@@ -620,9 +1061,13 @@ def _set_token_json(email, scopes, token_json):
     """Upsert token JSON for a user+scopes into DB."""
     if not email or not token_json:
         return
+    # str(dict) would store a Python repr, not JSON, which json.loads can't
+    # read back; serialize non-string payloads properly.
+    token_json = token_json if isinstance(token_json, str) else json.dumps(token_json)
     conn = get_db()
     key = _scopes_key(scopes)
     updated_at = datetime.now(timezone.utc).isoformat()
+    _CREDS_CACHE.pop((email, key), None)
     if USE_POSTGRESQL:
         cursor = db_execute(conn, '''
             INSERT INTO oauth_tokens (email, scopes_key, token_json, updated_at)
@@ -630,7 +1075,7 @@ def _set_token_json(email, scopes, token_json):
             ON CONFLICT (email, scopes_key) DO UPDATE SET
                 token_json = EXCLUDED.token_json,
                 updated_at = EXCLUDED.updated_at
-        ''', (email, key, str(token_json), updated_at))
+        ''', (email, key, token_json, updated_at))
         cursor.close()
     else:
         db_execute(conn, '''
@@ -639,14 +1084,43 @@ def _set_token_json(email, scopes, token_json):
             ON CONFLICT(email, scopes_key) DO UPDATE SET
                 token_json = excluded.token_json,
                 updated_at = excluded.updated_at
-        ''', (email, key, str(token_json), updated_at))
+        ''', (email, key, token_json, updated_at))
     conn.commit()
     conn.close()
 
+# Built Credentials shared across requests: the common repeat case skips the
+# DB read + JSON parse entirely. Entries are dropped on token writes and when
+# the underlying credentials expire.
+_CREDS_CACHE = {}
+_CREDS_CACHE_TTL_SECONDS = 300
+
 def _get_google_credentials(email, scopes):
-    """Build google Credentials from stored token_json and refresh if needed."""
-    if not GOOGLE_OAUTH_AVAILABLE:
+    """Build google Credentials from stored token_json and refresh if needed.
+
+    Cached on flask.g for the request lifetime and in a small process-wide TTL
+    map across requests: paths that make several Drive API calls would
+    otherwise redo the DB read + JSON parse + object build each time.
+    """
+    if not _ensure_google_oauth():
         return None
+    cache_key = (email, _scopes_key(scopes))
+    try:
+        creds_cache = g.setdefault('_creds_cache', {})
+        cached = creds_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    except RuntimeError:
+        # Outside an app context (background threads): no per-request cache.
+        creds_cache = None
+
+    hit = _CREDS_CACHE.get(cache_key)
+    if hit is not None:
+        if time.time() - hit[0] < _CREDS_CACHE_TTL_SECONDS and not hit[1].expired:
+            if creds_cache is not None:
+                creds_cache[cache_key] = hit[1]
+            return hit[1]
+        _CREDS_CACHE.pop(cache_key, None)
+
     token_json = _get_token_json(email, scopes)
     if not token_json:
         return None
@@ -656,34 +1130,76 @@ def _get_google_credentials(email, scopes):
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
             _set_token_json(email, scopes, creds.to_json())
+        if creds:
+            _CREDS_CACHE[cache_key] = (time.time(), creds)
+            if creds_cache is not None:
+                creds_cache[cache_key] = creds
         return creds
     except Exception:
         return None
 
+# Whitespace runs in multi-token cache keys (deep Drive folder paths), compiled
+# once: one pass over the string, no intermediate list from split().
+_WS_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=4096)
 def _normalize_cache_key(value):
-    """Normalize strings for cache keys (stable across whitespace/case variations)."""
+    """Normalize strings for cache keys (stable across whitespace/case variations).
+
+    Memoized: the same position/topic strings are normalized repeatedly per page
+    (three calls per cache lookup), so repeats cost one dict probe.
+    """
     if not value:
         return ''
     if not isinstance(value, str):
         value = str(value)
+    normalized = value.strip().lower()
+    if _WS_RE.search(normalized) is None:
+        # Single token: nothing to collapse.
+        return normalized
     # Collapse whitespace, lower-case, trim
-    return ' '.join(value.strip().lower().split())
+    return _WS_RE.sub(' ', normalized)
+
+# In-process TTL cache in front of the DB-backed AI caches: repeat lookups
+# within a dashboard render hit a dict instead of a connection + SELECT.
+# Keyed on the normalized (position_key, topic_key, topic_path_key) tuple.
+_AI_MEM_CACHE_TTL_SECONDS = 300
+_AI_MEM_CACHE_MAX_ENTRIES = 2048
+_AI_GUIDANCE_MEM_CACHE = {}
+_STUDY_NOTES_MEM_CACHE = {}
+
+def _mem_cache_get(cache, key):
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    if time.time() - hit[0] > _AI_MEM_CACHE_TTL_SECONDS:
+        cache.pop(key, None)
+        return None
+    return hit[1]
+
+def _mem_cache_put(cache, key, value):
+    if not value:
+        return
+    if len(cache) >= _AI_MEM_CACHE_MAX_ENTRIES:
+        # Evict the oldest insertion (dicts preserve order) to bound memory.
+        cache.pop(next(iter(cache)), None)
+    cache[key] = (time.time(), value)
 
 def _get_cached_ai_guidance(position, topic_name, topic_path):
     """Fetch cached AI guidance (if any) for a given position/topic/path."""
-    conn = get_db()
     position_key = _normalize_cache_key(position)
     topic_key = _normalize_cache_key(topic_name)
     topic_path_key = _normalize_cache_key(topic_path)
 
+    mem_key = (position_key, topic_key, topic_path_key)
+    cached = _mem_cache_get(_AI_GUIDANCE_MEM_CACHE, mem_key)
+    if cached is not None:
+        return cached
+
+    conn = get_db()
     try:
         if USE_POSTGRESQL:
-            cursor = db_execute(conn, '''
-                SELECT ai_guidance
-                FROM ai_guidance_cache
-                WHERE position_key = %s AND topic_key = %s AND topic_path_key = %s
-                LIMIT 1
-            ''', (position_key, topic_key, topic_path_key))
+            cursor = _pg_execute_prepared(conn, 'get_ai_guidance_stmt', (position_key, topic_key, topic_path_key))
             row = db_fetchone(cursor)
             cursor.close()
         else:
@@ -704,7 +1220,54 @@ def _get_cached_ai_guidance(position, topic_name, topic_path):
     conn.close()
     if not row:
         return None
-    return dict(row).get('ai_guidance') if USE_POSTGRESQL else row[0] if isinstance(row, tuple) else dict(row).get('ai_guidance')
+    # Both engines hand back a plain single-column row here.
+    guidance = row[0]
+    _mem_cache_put(_AI_GUIDANCE_MEM_CACHE, mem_key, guidance)
+    return guidance
+
+def _apply_cached_ai_guidance(conn, topic_id, position, topic_name, topic_path):
+    """
+    Combined cache lookup + topic update on an already-open connection.
+
+    Instead of SELECT cache -> close -> UPDATE topics (two extra connections),
+    run a single UPDATE ... RETURNING that copies the cached guidance onto the
+    topic row only when a cache entry exists. Returns the guidance on a cache
+    hit, else None.
+    """
+    position_key = _normalize_cache_key(position)
+    topic_key = _normalize_cache_key(topic_name)
+    topic_path_key = _normalize_cache_key(topic_path)
+
+    try:
+        cursor = db_execute(conn, '''
+            UPDATE topics
+            SET ai_guidance = (
+                SELECT ai_guidance FROM ai_guidance_cache
+                WHERE position_key = ? AND topic_key = ? AND topic_path_key = ?
+                LIMIT 1
+            )
+            WHERE id = ?
+              AND (
+                SELECT ai_guidance FROM ai_guidance_cache
+                WHERE position_key = ? AND topic_key = ? AND topic_path_key = ?
+                LIMIT 1
+              ) IS NOT NULL
+            RETURNING ai_guidance
+        ''', (position_key, topic_key, topic_path_key, topic_id,
+              position_key, topic_key, topic_path_key))
+        row = db_fetchone(cursor)
+        if USE_POSTGRESQL:
+            cursor.close()
+    except sqlite3.OperationalError as e:
+        # If migrations haven't run yet, treat as cache miss (do not fail request)
+        if 'no such table' in str(e).lower():
+            return None
+        raise
+    if not row:
+        return None
+    conn.commit()
+    return db_col(row, 0, 'ai_guidance')
+
 
 def _upsert_cached_ai_guidance(position, topic_name, topic_path, ai_guidance, model_provider=None, model_name=None):
     """Insert/update cached AI guidance for reuse across interviews."""
@@ -750,22 +1313,23 @@ def _upsert_cached_ai_guidance(position, topic_name, topic_path, ai_guidance, mo
 
     conn.commit()
     conn.close()
+    _mem_cache_put(_AI_GUIDANCE_MEM_CACHE, (position_key, topic_key, topic_path_key), ai_guidance)
 
 def _get_cached_study_notes(position, topic_name, topic_path):
     """Fetch cached study notes (if any) for a given position/topic/path."""
-    conn = get_db()
     position_key = _normalize_cache_key(position)
     topic_key = _normalize_cache_key(topic_name)
     topic_path_key = _normalize_cache_key(topic_path)
 
+    mem_key = (position_key, topic_key, topic_path_key)
+    cached = _mem_cache_get(_STUDY_NOTES_MEM_CACHE, mem_key)
+    if cached is not None:
+        return cached
+
+    conn = get_db()
     try:
         if USE_POSTGRESQL:
-            cursor = db_execute(conn, '''
-                SELECT notes_markdown
-                FROM study_notes_cache
-                WHERE position_key = %s AND topic_key = %s AND topic_path_key = %s
-                LIMIT 1
-            ''', (position_key, topic_key, topic_path_key))
+            cursor = _pg_execute_prepared(conn, 'get_study_notes_stmt', (position_key, topic_key, topic_path_key))
             row = db_fetchone(cursor)
             cursor.close()
         else:
@@ -786,11 +1350,10 @@ def _get_cached_study_notes(position, topic_name, topic_path):
     conn.close()
     if not row:
         return None
-    if USE_POSTGRESQL:
-        return dict(row).get('notes_markdown')
-    if isinstance(row, tuple):
-        return row[0]
-    return dict(row).get('notes_markdown')
+    # Both engines hand back a plain single-column row here.
+    notes = row[0]
+    _mem_cache_put(_STUDY_NOTES_MEM_CACHE, mem_key, notes)
+    return notes
 
 def _upsert_cached_study_notes(position, topic_name, topic_path, notes_markdown, model_provider=None, model_name=None):
     """Insert/update cached study notes for reuse across interviews."""
@@ -835,65 +1398,147 @@ def _upsert_cached_study_notes(position, topic_name, topic_path, notes_markdown,
 
     conn.commit()
     conn.close()
+    _mem_cache_put(_STUDY_NOTES_MEM_CACHE, (position_key, topic_key, topic_path_key), notes_markdown)
 
-def _hydrate_topic_ai_from_cache(conn, topic_id, position, topic_name, category_name):
-    """
-    If we have cached AI guidance/notes (global caches), populate the newly-created topic row.
-    This makes recreated interviews immediately show previously-generated material without re-generation.
-    """
-    try:
-        parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
-        topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else (topic_name or '')
+# DB-persisted common-topics entries older than this are treated as misses.
+_COMMON_TOPICS_DB_TTL_SECONDS = 7 * 24 * 3600
 
-        position_key = _normalize_cache_key(position)
-        topic_key = _normalize_cache_key(topic_name)
-        topic_path_key = _normalize_cache_key(topic_path_key_source)
-
-        cached_guidance = None
-        cached_notes = None
+def _get_cached_common_topics(position):
+    """Fetch the persisted common-topics list (if fresh) for a position."""
+    conn = get_db()
+    position_key = _normalize_cache_key(position)
 
-        # Guidance cache
-        try:
-            cur = db_execute(conn, '''
-                SELECT ai_guidance
-                FROM ai_guidance_cache
-                WHERE position_key = ? AND topic_key = ? AND topic_path_key = ?
+    try:
+        if USE_POSTGRESQL:
+            cursor = db_execute(conn, '''
+                SELECT topics_json, updated_at
+                FROM common_topics_cache
+                WHERE position_key = %s
                 LIMIT 1
-            ''', (position_key, topic_key, topic_path_key))
-            row = db_fetchone(cur)
-            if USE_POSTGRESQL:
-                cur.close()
-            if row:
-                cached_guidance = dict(row).get('ai_guidance') if USE_POSTGRESQL else row[0] if isinstance(row, tuple) else dict(row).get('ai_guidance')
-        except Exception:
-            # Cache table may not exist yet or query may fail; ignore.
-            cached_guidance = None
-
-        # Notes cache
-        try:
-            cur = db_execute(conn, '''
-                SELECT notes_markdown
-                FROM study_notes_cache
-                WHERE position_key = ? AND topic_key = ? AND topic_path_key = ?
+            ''', (position_key,))
+            row = db_fetchone(cursor)
+            cursor.close()
+        else:
+            cursor = db_execute(conn, '''
+                SELECT topics_json, updated_at
+                FROM common_topics_cache
+                WHERE position_key = ?
                 LIMIT 1
-            ''', (position_key, topic_key, topic_path_key))
-            row = db_fetchone(cur)
-            if USE_POSTGRESQL:
-                cur.close()
-            if row:
-                cached_notes = dict(row).get('notes_markdown') if USE_POSTGRESQL else row[0] if isinstance(row, tuple) else dict(row).get('notes_markdown')
-        except Exception:
-            cached_notes = None
+            ''', (position_key,))
+            row = db_fetchone(cursor)
+    except sqlite3.OperationalError as e:
+        conn.close()
+        if 'no such table' in str(e).lower():
+            return None
+        raise
+
+    conn.close()
+    if not row:
+        return None
+    row = dict(row)
+    try:
+        updated_at = datetime.fromisoformat(row.get('updated_at') or '')
+        if (datetime.now(timezone.utc) - updated_at).total_seconds() > _COMMON_TOPICS_DB_TTL_SECONDS:
+            return None
+        topics = json.loads(row.get('topics_json') or '')
+    except (ValueError, TypeError):
+        return None
+    return topics if isinstance(topics, list) and topics else None
+
+def _upsert_cached_common_topics(position, topics):
+    """Insert/update the persisted common-topics list for a position."""
+    if not topics:
+        return
+    conn = get_db()
+    position_key = _normalize_cache_key(position)
+    topics_json = json.dumps(topics)
+    updated_at = datetime.now(timezone.utc).isoformat()
+
+    try:
+        if USE_POSTGRESQL:
+            cursor = db_execute(conn, '''
+                INSERT INTO common_topics_cache (position_key, topics_json, updated_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (position_key)
+                DO UPDATE SET
+                    topics_json = EXCLUDED.topics_json,
+                    updated_at = EXCLUDED.updated_at
+            ''', (position_key, topics_json, updated_at))
+            cursor.close()
+        else:
+            db_execute(conn, '''
+                INSERT INTO common_topics_cache (position_key, topics_json, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(position_key)
+                DO UPDATE SET
+                    topics_json = excluded.topics_json,
+                    updated_at = excluded.updated_at
+            ''', (position_key, topics_json, updated_at))
+    except sqlite3.OperationalError as e:
+        conn.close()
+        if 'no such table' in str(e).lower():
+            return
+        raise
+
+    conn.commit()
+    conn.close()
+
+def _hydrate_topics_ai_batch(conn, position, topic_rows):
+    """
+    Populate newly-created topic rows from the global AI caches so recreated
+    interviews immediately show previously-generated material. One SELECT per
+    cache table covering every topic instead of two per topic (a classic N+1
+    when refresh_topics recreates dozens of rows against a remote Postgres).
+    Best-effort: failures are swallowed.
+    """
+    try:
+        position_key = _normalize_cache_key(position)
+        keyed = []  # (topic_id, topic_key, topic_path_key)
+        for topic_id, topic_name, category_name in topic_rows:
+            parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
+            topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else (topic_name or '')
+            keyed.append((topic_id, _normalize_cache_key(topic_name), _normalize_cache_key(topic_path_key_source)))
+        if not keyed:
+            return
+        pairs = sorted({(k, p) for _, k, p in keyed})
 
-        if cached_guidance or cached_notes:
-            # Update the topic row; only set fields that are present.
+        def _lookup(table, column):
+            placeholders = ' OR '.join(['(topic_key = ? AND topic_path_key = ?)'] * len(pairs))
+            params = [position_key]
+            for k, p in pairs:
+                params.extend((k, p))
+            try:
+                cur = db_execute(conn, f'''
+                    SELECT topic_key, topic_path_key, {column}
+                    FROM {table}
+                    WHERE position_key = ? AND ({placeholders})
+                ''', tuple(params))
+                rows = db_fetchall(cur)
+                if USE_POSTGRESQL:
+                    cur.close()
+            except Exception:
+                # Cache table may not exist yet or query may fail; ignore.
+                return {}
+            found = {}
+            for row in rows:
+                row = dict(row)
+                found[(row.get('topic_key'), row.get('topic_path_key'))] = row.get(column)
+            return found
+
+        guidance_map = _lookup('ai_guidance_cache', 'ai_guidance')
+        notes_map = _lookup('study_notes_cache', 'notes_markdown')
+
+        for topic_id, topic_key, topic_path_key in keyed:
+            cached_guidance = guidance_map.get((topic_key, topic_path_key))
+            cached_notes = notes_map.get((topic_key, topic_path_key))
+            if not cached_guidance and not cached_notes:
+                continue
             if USE_POSTGRESQL:
-                cur = db_execute(conn, '''
-                    UPDATE topics
-                    SET ai_guidance = COALESCE(%s, ai_guidance),
-                        ai_notes   = COALESCE(%s, ai_notes)
-                    WHERE id = %s
-                ''', (cached_guidance, cached_notes, topic_id))
+                # Prepared: the same UPDATE runs once per hydrated topic, and
+                # this connection is owned outright by the hydration thread
+                # (see _pg_execute_prepared's contract).
+                cur = _pg_execute_prepared(conn, 'hydrate_topic_ai_stmt',
+                                           (cached_guidance, cached_notes, topic_id))
                 cur.close()
             else:
                 db_execute(conn, '''
@@ -906,6 +1551,33 @@ def _hydrate_topic_ai_from_cache(conn, topic_id, position, topic_name, category_
         # Best-effort only
         return
 
+def _hydrate_topics_ai_async(position, topic_rows):
+    """
+    Hydrate newly-created topics from the global AI caches in a background thread.
+
+    The per-topic cache lookups are I/O-bound and not needed for the HTTP
+    response, so add_topic/refresh_topics can return their topic_ids
+    immediately instead of blocking on N reads. topic_rows is a list of
+    (topic_id, topic_name, category_name) tuples.
+    """
+    rows = [(tid, name, cat) for (tid, name, cat) in (topic_rows or []) if tid]
+    if not rows:
+        return
+
+    def _run():
+        try:
+            conn = get_db()
+            try:
+                _hydrate_topics_ai_batch(conn, position, rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            # Best-effort only (same contract as _hydrate_topics_ai_batch)
+            pass
+
+    threading.Thread(target=_run, daemon=True).start()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -924,9 +1596,7 @@ def is_admin_email(email):
         if not ADMIN_EMAILS:
             return True
     # In non-local environments, require explicit allowlist.
-    if not ADMIN_EMAILS:
-        return False
-    return email in [admin.strip().lower() for admin in ADMIN_EMAILS if admin.strip()]
+    return email in _ADMIN_EMAILS_SET
 
 def login_required(f):
     """Decorator to require Google OAuth login for admin routes"""
@@ -976,17 +1646,32 @@ def drive_login_required(f):
         email = session.get('user_email')
         if not email:
             return jsonify({'error': 'Not authenticated', 'auth_url': '/auth/login?drive=1'}), 401
-        scopes = SCOPES + [DRIVE_READONLY_SCOPE]
+        scopes = DRIVE_SCOPES
         creds = _get_google_credentials(email, scopes)
         if not creds:
             return jsonify({'error': 'Drive not connected', 'auth_url': '/auth/login?drive=1'}), 401
         return f(*args, **kwargs)
     return decorated_function
 
+# OAuth flows reused per thread: Flow.from_client_config re-parses the (constant)
+# client config and builds a fresh requests session each time. Thread-local
+# rather than shared because a Flow carries per-call OAuth state.
+_FLOW_LOCAL = threading.local()
+
+def _flow_for(scopes):
+    key = _scopes_key(scopes)
+    cache = getattr(_FLOW_LOCAL, 'flows', None)
+    if cache is None:
+        cache = _FLOW_LOCAL.flows = {}
+    flow = cache.get(key)
+    if flow is None:
+        flow = cache[key] = Flow.from_client_config(CLIENT_CONFIG, list(scopes))
+    return flow
+
 @app.route('/auth/login')
 def auth_login():
     """Initiate Google OAuth login"""
-    if not GOOGLE_OAUTH_AVAILABLE or not OAUTH_CONFIGURED:
+    if not _ensure_google_oauth() or not OAUTH_CONFIGURED:
         # Local dev convenience only; never auto-open admin on deploy.
         if _is_local_request():
             return redirect('/admin')
@@ -1010,13 +1695,13 @@ def auth_login():
 
         scopes = SCOPES
         if request.args.get('drive') == '1':
-            scopes = SCOPES + [DRIVE_READONLY_SCOPE]
+            scopes = DRIVE_SCOPES
 
         # Create flow with proper configuration
-        flow = Flow.from_client_config(CLIENT_CONFIG, scopes)
+        flow = _flow_for(scopes)
         
         # Construct redirect URI - ensure HTTPS for Railway
-        if 'railway.app' in request.host or os.getenv('RAILWAY_ENVIRONMENT'):
+        if 'railway.app' in request.host or _IS_RAILWAY:
             # Railway uses HTTPS, but request might come as HTTP due to proxy
             redirect_uri = f"https://{request.host}/auth/callback"
         else:
@@ -1046,14 +1731,13 @@ def auth_login():
         return redirect(authorization_url)
     except Exception as e:
         print(f"OAuth login error: {e}")
-        import traceback
         print(traceback.format_exc())
         return f"OAuth error: {e}", 500
 
 @app.route('/auth/callback')
 def auth_callback():
     """Handle Google OAuth callback"""
-    if not GOOGLE_OAUTH_AVAILABLE or not OAUTH_CONFIGURED:
+    if not _ensure_google_oauth() or not OAUTH_CONFIGURED:
         if _is_local_request():
             return redirect('/admin')
         return ("OAuth is not configured. Set GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET "
@@ -1082,10 +1766,10 @@ def auth_callback():
             else:
                 scopes = SCOPES
         # Create flow
-        flow = Flow.from_client_config(CLIENT_CONFIG, scopes)
+        flow = _flow_for(scopes)
         
         # Construct redirect URI - ensure HTTPS for Railway
-        if 'railway.app' in request.host or os.getenv('RAILWAY_ENVIRONMENT'):
+        if 'railway.app' in request.host or _IS_RAILWAY:
             # Railway uses HTTPS, but request might come as HTTP due to proxy
             redirect_uri = f"https://{request.host}/auth/callback"
         else:
@@ -1096,7 +1780,7 @@ def auth_callback():
         
         # Handle Railway proxy HTTPS issue
         authorization_response = request.url
-        if 'railway.app' in request.host or os.getenv('RAILWAY_ENVIRONMENT'):
+        if 'railway.app' in request.host or _IS_RAILWAY:
             authorization_response = authorization_response.replace('http://', 'https://')
         
         print(f"DEBUG: Authorization response URL: {authorization_response}")
@@ -1139,16 +1823,6 @@ def auth_logout():
     """Logout user"""
     # Clear all session data
     session.clear()
-    
-    if 'user_email' in session:
-        del session['user_email']
-    if 'user_name' in session:
-        del session['user_name']
-    if 'state' in session:
-        del session['state']
-    if 'oauth_scopes' in session:
-        del session['oauth_scopes']
-    
     session.permanent = False
     return redirect('/')
 
@@ -1173,13 +1847,30 @@ def drive_guide_view_latest():
 
 # ---- Google Drive (PDF + ipynb) ingestion ----
 
+# Built Drive services reused per thread: build() re-parses the discovery
+# document each call and a fresh http client pays TCP+TLS setup on its first
+# request. Thread-local because googleapiclient's http stack is not
+# thread-safe; entries are keyed on the credentials object so a refresh
+# (new Credentials from _get_google_credentials) drops the stale service.
+_DRIVE_SVC_LOCAL = threading.local()
+
 def _drive_service_for_session():
+    if not _ensure_google_oauth():
+        return None
     email = session.get('user_email')
-    scopes = SCOPES + [DRIVE_READONLY_SCOPE]
-    creds = _get_google_credentials(email, scopes)
+    creds = _get_google_credentials(email, DRIVE_SCOPES)
     if not creds:
         return None
-    return build('drive', 'v3', credentials=creds)
+    cache = getattr(_DRIVE_SVC_LOCAL, 'services', None)
+    if cache is None:
+        cache = _DRIVE_SVC_LOCAL.services = {}
+    key = (email, _DRIVE_SCOPES_KEY)
+    hit = cache.get(key)
+    if hit is not None and hit[0] is creds:
+        return hit[1]
+    svc = build('drive', 'v3', credentials=creds, cache_discovery=False)
+    cache[key] = (creds, svc)
+    return svc
 
 def _drive_list_folder_recursive(service, root_folder_id, include_subfolders=True, max_files=20000):
     """
@@ -1187,36 +1878,62 @@ def _drive_list_folder_recursive(service, root_folder_id, include_subfolders=Tru
     Limits to max_files to avoid runaway indexing.
     """
     results = []
-    queue = [(root_folder_id, '')]  # (folder_id, path_prefix)
     seen_folders = set()
+    # BFS frontier of (folder_id, path_prefix, page_token). Each round fans
+    # every pending listing out in a single batched HTTP request (Drive allows
+    # up to 100 calls per batch), so the listing phase costs roughly one
+    # roundtrip per 100 folders instead of one per folder per page.
+    frontier = deque([(root_folder_id, '', None)])
+
+    def _list_request(folder_id, page_token):
+        # IMPORTANT: We intentionally do NOT enumerate data files (csv/parquet/zip/images/etc).
+        # We only need folders (to recurse), PDFs (slides/notes), and notebooks (.ipynb).
+        q = (
+            f"'{folder_id}' in parents and trashed=false and ("
+            "mimeType='application/vnd.google-apps.folder' "
+            "or mimeType='application/pdf' "
+            "or name contains '.pdf' "
+            "or name contains '.ipynb'"
+            ")"
+        )
+        return service.files().list(
+            q=q,
+            fields="nextPageToken, files(id,name,mimeType,modifiedTime,size,parents)",
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True,
+            pageSize=1000,
+            pageToken=page_token
+        )
 
-    while queue and len(results) < max_files:
-        folder_id, prefix = queue.pop(0)
-        if folder_id in seen_folders:
-            continue
-        seen_folders.add(folder_id)
-
-        page_token = None
-        while True:
-            # IMPORTANT: We intentionally do NOT enumerate data files (csv/parquet/zip/images/etc).
-            # We only need folders (to recurse), PDFs (slides/notes), and notebooks (.ipynb).
-            q = (
-                f"'{folder_id}' in parents and trashed=false and ("
-                "mimeType='application/vnd.google-apps.folder' "
-                "or mimeType='application/pdf' "
-                "or name contains '.pdf' "
-                "or name contains '.ipynb'"
-                ")"
-            )
-            resp = service.files().list(
-                q=q,
-                fields="nextPageToken, files(id,name,mimeType,modifiedTime,size,parents)",
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True,
-                pageSize=1000,
-                pageToken=page_token
-            ).execute()
-            files = resp.get('files', [])
+    while frontier and len(results) < max_files:
+        pending = []
+        while frontier and len(pending) < 100:
+            folder_id, prefix, page_token = frontier.popleft()
+            if page_token is None:
+                if folder_id in seen_folders:
+                    continue
+                seen_folders.add(folder_id)
+            pending.append((folder_id, prefix, page_token))
+        if not pending:
+            break
+
+        outcomes = [None] * len(pending)
+        if len(pending) == 1:
+            folder_id, prefix, page_token = pending[0]
+            outcomes[0] = (_list_request(folder_id, page_token).execute(), None)
+        else:
+            def _collect(request_id, response, exception):
+                outcomes[int(request_id)] = (response, exception)
+            batch = service.new_batch_http_request()
+            for i, (folder_id, prefix, page_token) in enumerate(pending):
+                batch.add(_list_request(folder_id, page_token), request_id=str(i), callback=_collect)
+            batch.execute()
+
+        for (folder_id, prefix, page_token), outcome in zip(pending, outcomes):
+            resp, exc = outcome if outcome else (None, None)
+            if exc is not None:
+                raise exc
+            files = (resp or {}).get('files', [])
 
             for f in files:
                 name = f.get('name') or ''
@@ -1235,13 +1952,15 @@ def _drive_list_folder_recursive(service, root_folder_id, include_subfolders=Tru
                 }
                 results.append(item)
                 if include_subfolders and is_folder and item['id']:
-                    queue.append((item['id'], path))
+                    frontier.append((item['id'], path, None))
 
                 if len(results) >= max_files:
                     break
 
-            page_token = resp.get('nextPageToken')
-            if not page_token or len(results) >= max_files:
+            next_token = (resp or {}).get('nextPageToken')
+            if next_token and len(results) < max_files:
+                frontier.append((folder_id, prefix, next_token))
+            if len(results) >= max_files:
                 break
 
     return results
@@ -1311,7 +2030,9 @@ def _drive_download_bytes(service, file_id):
     fh = io.BytesIO()
     try:
         from googleapiclient.http import MediaIoBaseDownload
-        downloader = MediaIoBaseDownload(fh, req)
+        # Default chunk size is small enough that a typical PDF takes dozens
+        # of roundtrips; 10 MB chunks fetch most files in a single GET.
+        downloader = MediaIoBaseDownload(fh, req, chunksize=10 * 1024 * 1024)
         done = False
         while not done:
             _, done = downloader.next_chunk()
@@ -1398,6 +2119,11 @@ def _drive_extract_text_for_file(service, file_id, meta=None):
         return _extract_text_ipynb(raw), meta
     raise Exception(f"Unsupported file type for extraction: {mime or name or file_id}")
 
+# Code lines worth keeping from notebook cells (imports, definitions,
+# comments). One C-level regex match per line beats the chain of Python
+# startswith checks it replaces.
+_CODE_KEEP_RE = re.compile(r'^(import |from |def |class |#)')
+
 def _extract_text_ipynb(raw_bytes, max_chars=120000):
     """Extract text content from a Jupyter notebook (.ipynb)."""
     try:
@@ -1421,19 +2147,9 @@ def _extract_text_ipynb(raw_bytes, max_chars=120000):
             code = src.strip()
             if not code:
                 continue
-            keep = []
-            for line in code.splitlines():
-                l = line.strip()
-                if not l:
-                    continue
-                if l.startswith('import ') or l.startswith('from '):
-                    keep.append(line)
-                elif l.startswith('def ') or l.startswith('class '):
-                    keep.append(line)
-                elif l.startswith('#'):
-                    keep.append(line)
+            keep = [line for line in code.splitlines() if _CODE_KEEP_RE.match(line.lstrip())][:80]
             if keep:
-                parts.append("```python\n" + "\n".join(keep[:80]) + "\n```")
+                parts.append("```python\n" + "\n".join(keep) + "\n```")
     text = "\n\n".join(parts).strip()
     return text[:max_chars]
 
@@ -1446,20 +2162,30 @@ def _extract_text_pdf(raw_bytes, max_chars=160000):
     try:
         reader = PdfReader(io.BytesIO(raw_bytes))
         out = []
+        # Running total instead of re-summing every page (quadratic on big
+        # PDFs); pages past the cap are never even parsed.
+        total_chars = 0
         for page in reader.pages:
             try:
                 t = (page.extract_text() or '').strip()
                 if t:
                     out.append(t)
+                    total_chars += len(t)
             except Exception:
                 continue
-            if sum(len(x) for x in out) > max_chars:
+            if total_chars > max_chars:
                 break
         text = "\n\n".join(out).strip()
         return text[:max_chars]
     except Exception:
         return ''
 
+# Compiled once: this runs per line of every indexed file, and re.match would
+# pay a pattern-cache lookup on each call.
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+_TITLELIKE_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9\s\-\(\)\./:,&]+$')
+_SKIP_PREFIX_RE = re.compile(r'^(Answer|Page|Figure|Table)\b', re.I)
+
 def _extract_candidate_topics_heuristic(text, max_topics=30):
     """Quick heuristic topic extractor (markdown headings + title-like lines)."""
     if not text:
@@ -1470,7 +2196,7 @@ def _extract_candidate_topics_heuristic(text, max_topics=30):
         l = line.strip()
         if not l:
             continue
-        m = re.match(r'^(#{1,6})\s+(.+)$', l)
+        m = _HEADING_RE.match(l) if l[0] == '#' else None
         if m:
             title = m.group(2).strip().strip('#').strip()
             if 3 <= len(title) <= 90:
@@ -1478,8 +2204,8 @@ def _extract_candidate_topics_heuristic(text, max_topics=30):
                 if k not in seen:
                     seen.add(k)
                     topics.append(title)
-        if len(l) <= 60 and re.match(r'^[A-Za-z0-9][A-Za-z0-9\s\-\(\)\./:,&]+$', l) and l[0].isupper():
-            if re.match(r'^(Answer|Page|Figure|Table)\b', l, re.I):
+        if len(l) <= 60 and _TITLELIKE_RE.match(l) and l[0].isupper():
+            if _SKIP_PREFIX_RE.match(l):
                 continue
             k = l.lower()
             if k not in seen:
@@ -1489,12 +2215,83 @@ def _extract_candidate_topics_heuristic(text, max_topics=30):
             break
     return topics[:max_topics]
 
+# Keep extraction results for a month; content hashes change with the source
+# material, so stale entries just age out rather than serving wrong answers.
+_AI_TOPIC_CACHE_MAX_AGE_DAYS = 30
+
+def _get_cached_topic_extraction(content_key):
+    """Fetch a cached topic-extraction result by content hash."""
+    conn = get_db()
+    try:
+        cur = db_execute(conn, 'SELECT topics_json FROM ai_topic_cache WHERE content_key = ? LIMIT 1', (content_key,))
+        row = db_fetchone(cur)
+        if USE_POSTGRESQL:
+            cur.close()
+        conn.close()
+        if not row:
+            return None
+        topics = json.loads(db_col(row, 0, 'topics_json'))
+        return topics if isinstance(topics, list) else None
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        return None
+
+def _set_cached_topic_extraction(content_key, topics):
+    """Upsert a topic-extraction result; sweeps out entries past max age."""
+    if not topics:
+        return
+    conn = get_db()
+    try:
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=_AI_TOPIC_CACHE_MAX_AGE_DAYS)).isoformat()
+        db_execute(conn, 'DELETE FROM ai_topic_cache WHERE created_at < ?', (cutoff,))
+        if USE_POSTGRESQL:
+            cur = db_execute(conn, '''
+                INSERT INTO ai_topic_cache (content_key, topics_json, created_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (content_key) DO UPDATE SET
+                    topics_json = EXCLUDED.topics_json,
+                    created_at = EXCLUDED.created_at
+            ''', (content_key, json.dumps(topics, ensure_ascii=False), now.isoformat()))
+            cur.close()
+        else:
+            db_execute(conn, '''
+                INSERT INTO ai_topic_cache (content_key, topics_json, created_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(content_key) DO UPDATE SET
+                    topics_json = excluded.topics_json,
+                    created_at = excluded.created_at
+            ''', (content_key, json.dumps(topics, ensure_ascii=False), now.isoformat()))
+        conn.commit()
+        conn.close()
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
 def _ai_extract_topics(text, max_topics=20, title_hint=None):
     """Use configured AI provider to extract a concise topic list."""
     if not text:
         return []
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
+    if groq_key and Groq is not None:
+        model_name = 'llama-3.1-8b-instant'
+    elif gemini_key and genai is not None:
+        model_name = 'gemini-pro'
+    else:
+        return []
+    # Memoize by content hash: unchanged material skips the LLM call entirely.
+    content_key = hashlib.sha256(
+        f"{text[:20000]}|{max_topics}|{model_name}".encode('utf-8', 'ignore')
+    ).hexdigest()
+    cached = _get_cached_topic_extraction(content_key)
+    if cached is not None:
+        return cached[:max_topics]
     prompt = f"""
 You are extracting study topics from course material.
 Return ONLY a JSON array of strings (no markdown, no extra keys).
@@ -1508,21 +2305,18 @@ Material:
 {text[:20000]}
 """.strip()
     try:
-        if groq_key and Groq is not None:
-            client = Groq(api_key=groq_key)
+        if model_name == 'llama-3.1-8b-instant':
+            client = _get_groq_client()
             resp = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+                model=model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
                 max_tokens=600
             )
             raw = resp.choices[0].message.content.strip()
-        elif gemini_key and genai is not None:
-            genai.configure(api_key=gemini_key)
-            model = genai.GenerativeModel('gemini-pro')
-            raw = (model.generate_content(prompt).text or '').strip()
         else:
-            return []
+            model = _get_gemini_model(model_name)
+            raw = (_gemini_generate_text(model, prompt).text or '').strip()
         m = re.search(r'\[[\s\S]*\]', raw)
         if not m:
             return []
@@ -1540,7 +2334,10 @@ Material:
                 continue
             seen.add(k)
             cleaned.append(s)
-        return cleaned[:max_topics]
+        cleaned = cleaned[:max_topics]
+        # Only cache genuine output; failures stay retryable.
+        _set_cached_topic_extraction(content_key, cleaned)
+        return cleaned
     except Exception:
         return []
 
@@ -1578,23 +2375,29 @@ def drive_index():
         if is_pdf or is_ipynb:
             wanted.append(it)
 
+    # One parameter tuple per file, upserted in a single batched statement and
+    # one transaction instead of a round-trip per file.
+    upsert_rows = []
+    for it in wanted:
+        file_id = it.get('id')
+        if not file_id:
+            continue
+        name = it.get('name') or ''
+        mime = it.get('mimeType') or ''
+        modified = it.get('modifiedTime')
+        size = int(it.get('size') or 0)
+        path = it.get('path') or name
+        parent_id = (it.get('parents') or [None])[0]
+        upsert_rows.append((file_id, folder_id, name, mime, modified, size, path, parent_id, now))
+
     conn = get_db()
     try:
-        for it in wanted:
-            file_id = it.get('id')
-            if not file_id:
-                continue
-            name = it.get('name') or ''
-            mime = it.get('mimeType') or ''
-            modified = it.get('modifiedTime')
-            size = int(it.get('size') or 0)
-            path = it.get('path') or name
-            parent_id = (it.get('parents') or [None])[0]
-
+        if upsert_rows:
             if USE_POSTGRESQL:
-                cur = db_execute(conn, '''
+                cur = conn.cursor()
+                execute_values(cur, '''
                     INSERT INTO drive_files (file_id, folder_id, name, mime_type, modified_time, size, path, parent_id, indexed_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    VALUES %s
                     ON CONFLICT (file_id) DO UPDATE SET
                         folder_id = EXCLUDED.folder_id,
                         name = EXCLUDED.name,
@@ -1604,10 +2407,10 @@ def drive_index():
                         path = EXCLUDED.path,
                         parent_id = EXCLUDED.parent_id,
                         indexed_at = EXCLUDED.indexed_at
-                ''', (file_id, folder_id, name, mime, modified, size, path, parent_id, now))
+                ''', upsert_rows, page_size=500)
                 cur.close()
             else:
-                db_execute(conn, '''
+                conn.executemany('''
                     INSERT INTO drive_files (file_id, folder_id, name, mime_type, modified_time, size, path, parent_id, indexed_at)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ON CONFLICT(file_id) DO UPDATE SET
@@ -1619,7 +2422,7 @@ def drive_index():
                         path = excluded.path,
                         parent_id = excluded.parent_id,
                         indexed_at = excluded.indexed_at
-                ''', (file_id, folder_id, name, mime, modified, size, path, parent_id, now))
+                ''', upsert_rows)
         conn.commit()
     finally:
         conn.close()
@@ -1640,25 +2443,32 @@ def drive_extract_topics():
     if limit < 1 or limit > 100:
         limit = 10
     force = bool(data.get('force') or False)
+    force_ai = bool(data.get('force_ai') or False)
     folder_id = (data.get('folder_id') or get_setting('drive_last_folder_id', '') or '').strip()
     if not folder_id:
         return jsonify({'error': 'folder_id is required (index a folder first)'}), 400
 
-    svc = _drive_service_for_session()
-    if not svc:
+    if not _ensure_google_oauth():
+        return jsonify({'error': 'Drive not connected', 'auth_url': '/auth/login?drive=1'}), 401
+    creds = _get_google_credentials(session.get('user_email'), DRIVE_SCOPES)
+    if not creds:
         return jsonify({'error': 'Drive not connected', 'auth_url': '/auth/login?drive=1'}), 401
 
     conn = get_db()
     rows = []
     try:
+        # Filter already-processed files in SQL rather than shipping 5x the
+        # rows and discarding most of them in Python; force=True disables the
+        # predicate so everything comes back.
         if USE_POSTGRESQL:
             cur = db_execute(conn, '''
                 SELECT file_id, folder_id, name, mime_type, modified_time, extracted_at, extracted_topics_json, text_excerpt
                 FROM drive_files
                 WHERE folder_id = %s
+                  AND (%s OR extracted_at IS NULL OR text_excerpt IS NULL)
                 ORDER BY indexed_at DESC NULLS LAST
                 LIMIT %s
-            ''', (folder_id, max(limit * 5, limit),))
+            ''', (folder_id, force, max(limit * 5, limit),))
             rows = [dict(r) for r in db_fetchall(cur)]
             cur.close()
         else:
@@ -1666,60 +2476,112 @@ def drive_extract_topics():
                 SELECT file_id, folder_id, name, mime_type, modified_time, extracted_at, extracted_topics_json, text_excerpt
                 FROM drive_files
                 WHERE folder_id = ?
+                  AND (? OR extracted_at IS NULL OR text_excerpt IS NULL)
                 ORDER BY indexed_at DESC
                 LIMIT ?
-            ''', (folder_id, max(limit * 5, limit),))
+            ''', (folder_id, force, max(limit * 5, limit),))
             rows = [dict(r) for r in db_fetchall(cur)]
     finally:
         conn.close()
 
-    processed = []
+    # Pick the files to process first (mime/name come from the index, so
+    # unsupported files are skipped without downloading anything).
+    candidates = []
     for f in rows:
-        if len(processed) >= limit:
+        if len(candidates) >= limit:
             break
-        # If we've already extracted topics but never stored an excerpt, we still want to download once
-        # to store text_excerpt for downstream features (flashcards, etc.).
-        if not force and f.get('extracted_at') and f.get('text_excerpt'):
+        if not f.get('file_id'):
             continue
-        file_id = f.get('file_id')
-        name = f.get('name') or ''
+        name = (f.get('name') or '').lower()
         mime = f.get('mime_type') or ''
-        if not file_id:
+        if not (mime == 'application/pdf' or name.endswith('.pdf')
+                or name.endswith('.ipynb') or mime in ('application/x-ipynb+json',)):
             continue
-        try:
-            raw = _drive_download_bytes(svc, file_id)
-            is_pdf = mime == 'application/pdf' or name.lower().endswith('.pdf')
-            is_ipynb = name.lower().endswith('.ipynb') or mime in ('application/x-ipynb+json',)
-            if is_ipynb:
-                text = _extract_text_ipynb(raw)
-            elif is_pdf:
-                text = _extract_text_pdf(raw)
-            else:
-                continue
-            # Persist a short excerpt so later study tools (flashcards, etc.) can be grounded in the exact material.
-            excerpt = (text or '').replace('\x00', '').strip()[:20000]
-
-            # If topics were already extracted and we're not forcing, just store the excerpt quickly.
-            if (not force) and f.get('extracted_at') and f.get('extracted_topics_json'):
-                conn = get_db()
+        candidates.append(f)
+
+    def _has_fresh_excerpt(f):
+        # The stored excerpt is current when extraction happened after Drive's
+        # last modification (both are ISO-8601 UTC, so string order works);
+        # re-extracting such a file needs no download at all.
+        return bool(f.get('text_excerpt') and f.get('extracted_at') and f.get('modified_time')
+                    and str(f['extracted_at']) > str(f['modified_time']))
+
+    # Downloads are independent HTTPS roundtrips, so fan them out; wall time
+    # drops to roughly the slowest file. googleapiclient service objects are
+    # not thread-safe, so each worker builds its own from the shared
+    # (already refreshed) credentials.
+    _svc_local = threading.local()
+
+    def _fetch(f):
+        svc = getattr(_svc_local, 'svc', None)
+        if svc is None:
+            svc = _svc_local.svc = build('drive', 'v3', credentials=creds)
+        return _drive_download_bytes(svc, f['file_id'])
+
+    to_download = [f for f in candidates if not _has_fresh_excerpt(f)]
+    raw_by_file = {}
+    if to_download:
+        with ThreadPoolExecutor(max_workers=min(8, len(to_download))) as ex:
+            futures = {ex.submit(_fetch, f): f for f in to_download}
+            for fut in as_completed(futures):
+                fid = futures[fut]['file_id']
                 try:
+                    raw_by_file[fid] = fut.result()
+                except Exception as e:
+                    raw_by_file[fid] = e
+
+    processed = []
+    # One connection for the whole loop: per-file get_db()/close() churn costs
+    # a pool checkout (PG) and defeats sqlite3's per-connection statement cache
+    # for the repeated UPDATE shapes. Commits stay per-file so a slow LLM call
+    # never holds a long write transaction.
+    conn = get_db()
+    try:
+        for f in candidates:
+            file_id = f.get('file_id')
+            name = f.get('name') or ''
+            mime = f.get('mime_type') or ''
+            try:
+                if _has_fresh_excerpt(f):
+                    # Unchanged since last extraction: work from the stored
+                    # excerpt, no download or re-parse needed.
+                    text = f['text_excerpt']
+                else:
+                    raw = raw_by_file.get(file_id)
+                    if isinstance(raw, Exception):
+                        raise raw
+                    is_pdf = mime == 'application/pdf' or name.lower().endswith('.pdf')
+                    is_ipynb = name.lower().endswith('.ipynb') or mime in ('application/x-ipynb+json',)
+                    if is_ipynb:
+                        text = _extract_text_ipynb(raw)
+                    elif is_pdf:
+                        text = _extract_text_pdf(raw)
+                    else:
+                        continue
+                # Persist a short excerpt so later study tools (flashcards, etc.) can be grounded in the exact material.
+                excerpt = (text or '').replace('\x00', '').strip()[:20000]
+
+                # If topics were already extracted and we're not forcing, just store the excerpt quickly.
+                if (not force) and f.get('extracted_at') and f.get('extracted_topics_json'):
                     if USE_POSTGRESQL:
                         cur = db_execute(conn, 'UPDATE drive_files SET text_excerpt = %s WHERE file_id = %s', (excerpt, file_id))
                         cur.close()
                     else:
                         db_execute(conn, 'UPDATE drive_files SET text_excerpt = ? WHERE file_id = ?', (excerpt, file_id))
                     conn.commit()
-                finally:
-                    conn.close()
-                processed.append({'file_id': file_id, 'name': name, 'excerpt_saved': True, 'topics': 'skipped'})
-                continue
+                    processed.append({'file_id': file_id, 'name': name, 'excerpt_saved': True, 'topics': 'skipped'})
+                    continue
 
-            heuristic = _extract_candidate_topics_heuristic(text, max_topics=30)
-            ai_topics = _ai_extract_topics(text, max_topics=20, title_hint=name) if text else []
-            topics = ai_topics or heuristic
+                heuristic = _extract_candidate_topics_heuristic(text, max_topics=30)
+                # Well-structured files yield plenty of clean headings on their
+                # own; skip the LLM roundtrip unless the caller wants
+                # refinement (force_ai) or the heuristic came up short.
+                if not force_ai and len(heuristic) >= 8:
+                    topics, ai_topics = heuristic[:20], []
+                else:
+                    ai_topics = _ai_extract_topics(text, max_topics=20, title_hint=name) if text else []
+                    topics = ai_topics or heuristic
 
-            conn = get_db()
-            try:
                 now = datetime.now(timezone.utc).isoformat()
                 payload = json.dumps({'topics': topics, 'heuristic': heuristic[:30], 'ai': ai_topics[:20]}, ensure_ascii=False)
                 if USE_POSTGRESQL:
@@ -1740,36 +2602,71 @@ def drive_extract_topics():
                         WHERE file_id = ?
                     ''', (payload, excerpt, now, file_id))
                 conn.commit()
-            finally:
-                conn.close()
 
-            processed.append({'file_id': file_id, 'name': name, 'topics': topics, 'excerpt_saved': True})
-        except Exception as e:
-            processed.append({'file_id': file_id, 'name': name, 'error': str(e)})
+                processed.append({'file_id': file_id, 'name': name, 'topics': topics, 'excerpt_saved': True})
+            except Exception as e:
+                # A failed statement aborts the PG transaction; clear it so the
+                # next file can still be written.
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                processed.append({'file_id': file_id, 'name': name, 'error': str(e)})
+    finally:
+        conn.close()
 
     return jsonify({'processed': processed, 'count': len(processed)})
 
-def _topic_key(topic):
-    return ' '.join(str(topic or '').strip().lower().split())
+# Same normalization as the AI cache keys; reusing it gets the memoized
+# single-pass whitespace collapse instead of rebuilding 3-4 intermediate
+# strings per summary probe.
+_topic_key = _normalize_cache_key
+
+# Filler words that heading authors bolt onto topic names ("Logistic Regression
+# Basics" vs "Logistic regression"). Stripping them gives a second, relaxed
+# cache key so near-duplicate topics share one summary instead of each paying
+# a fresh LLM call.
+_TOPIC_FILLER_WORDS = frozenset({
+    'basics', 'basic', 'intro', 'introduction', 'fundamentals',
+    'overview', 'essentials', 'concepts', 'notes', 'review',
+})
+
+@lru_cache(maxsize=4096)
+def _relaxed_topic_key(key):
+    """Strip leading/trailing filler tokens from an already-normalized key."""
+    if not key:
+        return key
+    words = key.split(' ')
+    while words and words[-1] in _TOPIC_FILLER_WORDS:
+        words.pop()
+    while words and words[0] in _TOPIC_FILLER_WORDS:
+        words.pop(0)
+    return ' '.join(words) if words else key
 
 def _get_drive_topic_summary(topic):
-    """Fetch cached concise summary for a topic."""
+    """Fetch cached concise summary for a topic (exact key, then relaxed)."""
     key = _topic_key(topic)
     if not key:
         return None
+    relaxed = _relaxed_topic_key(key)
+    probes = (key,) if relaxed == key else (key, relaxed)
     conn = get_db()
     try:
-        if USE_POSTGRESQL:
-            cur = db_execute(conn, 'SELECT summary_markdown FROM drive_topic_summaries WHERE topic_key = %s LIMIT 1', (key,))
-            row = db_fetchone(cur)
-            cur.close()
-            conn.close()
-            return dict(row).get('summary_markdown') if row else None
-        else:
-            cur = db_execute(conn, 'SELECT summary_markdown FROM drive_topic_summaries WHERE topic_key = ? LIMIT 1', (key,))
-            row = db_fetchone(cur)
-            conn.close()
-            return row[0] if row else None
+        for k in probes:
+            if USE_POSTGRESQL:
+                cur = db_execute(conn, 'SELECT summary_markdown FROM drive_topic_summaries WHERE topic_key = %s LIMIT 1', (k,))
+                row = db_fetchone(cur)
+                cur.close()
+                summary = db_col(row, 0, 'summary_markdown') if row else None
+            else:
+                cur = db_execute(conn, 'SELECT summary_markdown FROM drive_topic_summaries WHERE topic_key = ? LIMIT 1', (k,))
+                row = db_fetchone(cur)
+                summary = row[0] if row else None
+            if summary:
+                conn.close()
+                return summary
+        conn.close()
+        return None
     except Exception:
         try:
             conn.close()
@@ -1778,52 +2675,120 @@ def _get_drive_topic_summary(topic):
         return None
 
 def _set_drive_topic_summary(topic, summary_markdown):
-    """Upsert cached concise summary for a topic."""
+    """Upsert cached concise summary for a topic (exact and relaxed keys)."""
     key = _topic_key(topic)
     if not key or not summary_markdown:
         return
+    relaxed = _relaxed_topic_key(key)
+    keys = (key,) if relaxed == key else (key, relaxed)
     conn = get_db()
     now = datetime.now(timezone.utc).isoformat()
-    if USE_POSTGRESQL:
-        cur = db_execute(conn, '''
-            INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (topic_key) DO UPDATE SET
-                summary_markdown = EXCLUDED.summary_markdown,
-                updated_at = EXCLUDED.updated_at
-        ''', (key, str(summary_markdown), now))
-        cur.close()
-    else:
-        db_execute(conn, '''
-            INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(topic_key) DO UPDATE SET
-                summary_markdown = excluded.summary_markdown,
-                updated_at = excluded.updated_at
-        ''', (key, str(summary_markdown), now))
+    for k in keys:
+        if USE_POSTGRESQL:
+            cur = db_execute(conn, '''
+                INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (topic_key) DO UPDATE SET
+                    summary_markdown = EXCLUDED.summary_markdown,
+                    updated_at = EXCLUDED.updated_at
+            ''', (k, str(summary_markdown), now))
+            cur.close()
+        else:
+            db_execute(conn, '''
+                INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(topic_key) DO UPDATE SET
+                    summary_markdown = excluded.summary_markdown,
+                    updated_at = excluded.updated_at
+            ''', (k, str(summary_markdown), now))
     conn.commit()
     conn.close()
 
-def _ai_concise_topic_bullets(topics):
-    """
-    Generate concise review bullets for a list of topics.
-    Returns markdown text.
+def _set_drive_topic_summaries_bulk(pairs):
+    """Upsert many (topic, summary_markdown) pairs in ONE transaction.
+
+    Guide generation produces a summary per topic section; committing each
+    individually costs a transaction (and WAL fsync) per topic. Batch them.
     """
-    topics = [t for t in (topics or []) if str(t or '').strip()]
-    if not topics:
-        return ''
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
-    if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
-        raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
+    now = datetime.now(timezone.utc).isoformat()
+    rows = {}
+    for topic, summary_markdown in (pairs or []):
+        key = _topic_key(topic)
+        if not key or not summary_markdown:
+            continue
+        relaxed = _relaxed_topic_key(key)
+        rows[key] = (key, str(summary_markdown), now)
+        if relaxed != key:
+            rows[relaxed] = (relaxed, str(summary_markdown), now)
+    if not rows:
+        return
+    conn = get_db()
+    try:
+        if USE_POSTGRESQL:
+            cur = conn.cursor()
+            execute_values(cur, '''
+                INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
+                VALUES %s
+                ON CONFLICT (topic_key) DO UPDATE SET
+                    summary_markdown = EXCLUDED.summary_markdown,
+                    updated_at = EXCLUDED.updated_at
+            ''', list(rows.values()), page_size=500)
+            cur.close()
+        else:
+            conn.executemany('''
+                INSERT INTO drive_topic_summaries (topic_key, summary_markdown, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(topic_key) DO UPDATE SET
+                    summary_markdown = excluded.summary_markdown,
+                    updated_at = excluded.updated_at
+            ''', list(rows.values()))
+        conn.commit()
+    finally:
+        conn.close()
 
-    topic_list = "\n".join([f"- {t}" for t in topics])
-    prompt = f"""
-You are producing a CONCISE review study guide for an AI/ML course.
-For EACH topic below, output a markdown section exactly like:
+def _groq_stream_text(client, messages, temperature, max_tokens):
+    """Run a Groq chat completion with stream=True and join the deltas.
 
-## <Topic>
-- <bullet 1>
+    Long guide generations hold the connection open for seconds; streaming
+    lets the client start consuming tokens as they arrive instead of idling
+    for the whole completion. Callers still get the full text back.
+    """
+    parts = []
+    stream = client.chat.completions.create(
+        model="llama-3.1-8b-instant",
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+    return ''.join(parts).strip()
+
+def _gemini_stream_text(model, prompt):
+    """Gemini counterpart of _groq_stream_text."""
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        try:
+            if chunk.text:
+                parts.append(chunk.text)
+        except Exception:
+            continue
+    return ''.join(parts).strip()
+
+# Static instruction blocks for the AI generators, hoisted so every byte of
+# constant text precedes the variable payload. Providers key their prompt
+# caches on exact prefixes (Groq/OpenAI additionally on the system message),
+# so keeping rules byte-identical across calls turns the instruction tokens
+# into cache hits; only the dynamic tail is new work.
+_CONCISE_BULLETS_RULES = """
+You are producing a CONCISE review study guide for an AI/ML course.
+For EACH topic below, output a markdown section exactly like:
+
+## <Topic>
+- <bullet 1>
 - <bullet 2>
 - <bullet 3>
 - <bullet 4>
@@ -1834,24 +2799,33 @@ Rules:
 - avoid long paragraphs
 - do NOT include any extra commentary outside the topic sections
 - write any formulas using LaTeX (use \\( ... \\) inline and $$ ... $$ for display)
-
-Topics:
-{topic_list}
 """.strip()
 
+def _ai_concise_topic_bullets(topics):
+    """
+    Generate concise review bullets for a list of topics.
+    Returns markdown text.
+    """
+    topics = [t for t in (topics or []) if str(t or '').strip()]
+    if not topics:
+        return ''
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
+    if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
+        raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
+
+    topic_list = "\n".join([f"- {t}" for t in topics])
+    dynamic = f"Topics:\n{topic_list}"
+
     if groq_key and Groq is not None:
-        client = Groq(api_key=groq_key)
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.25,
-            max_tokens=1800
-        )
-        return resp.choices[0].message.content.strip()
+        client = _get_groq_client()
+        return _groq_stream_text(client, [
+            {"role": "system", "content": _CONCISE_BULLETS_RULES},
+            {"role": "user", "content": dynamic},
+        ], temperature=0.25, max_tokens=1800)
     # Gemini fallback
-    genai.configure(api_key=gemini_key)
-    model = genai.GenerativeModel('gemini-pro')
-    return (model.generate_content(prompt).text or '').strip()
+    model = _get_gemini_model()
+    return _gemini_stream_text(model, _CONCISE_BULLETS_RULES + "\n\n" + dynamic)
 
 def _module_from_path(path):
     p = (path or '').strip()
@@ -1866,32 +2840,68 @@ def _module_sort_key(name):
         return (int(m.group(1)), str(name))
     return (10**9, str(name))
 
+# Low-signal notebook operational phrases that clutter a study guide.
+# Keep this conservative. Compiled once into a single alternation (longest
+# phrase first so e.g. 'load data' never shadows 'loading data') so the hot
+# per-topic filter is one C-level regex scan instead of a Python loop.
+_NOISE_PHRASES = (
+    'importing libraries',
+    'import libraries',
+    'scipy stats',
+    'loading data',
+    'load data',
+    'data preparation',
+    'data preprocessing',
+    'data cleaning',
+    'reading data',
+    'visualization',
+    'plotting',
+    'exploratory data analysis',
+    'eda',
+    'installing',
+    'setup',
+)
+_NOISE_RE = re.compile('|'.join(map(re.escape, sorted(_NOISE_PHRASES, key=len, reverse=True))))
+
+@lru_cache(maxsize=4096)
+def _is_noise_topic_key(key):
+    """Noise check on an already-normalized topic key (see _is_noise_topic).
+
+    Memoized on the normalized key so spelling/whitespace variants of the
+    same topic share one cache entry across files.
+    """
+    if not key:
+        return True
+    return _NOISE_RE.search(key) is not None
+
 def _is_noise_topic(topic):
     """
     Filter out low-signal notebook operational topics that clutter a study guide.
-    Keep this conservative.
+    Keep this conservative. Callers holding a normalized key already can use
+    _is_noise_topic_key directly and skip the re-normalization.
     """
-    t = _topic_key(topic)
-    if not t:
-        return True
-    noise = [
-        'importing libraries',
-        'import libraries',
-        'scipy stats',
-        'loading data',
-        'load data',
-        'data preparation',
-        'data preprocessing',
-        'data cleaning',
-        'reading data',
-        'visualization',
-        'plotting',
-        'exploratory data analysis',
-        'eda',
-        'installing',
-        'setup',
-    ]
-    return any(n in t for n in noise)
+    return _is_noise_topic_key(_topic_key(topic))
+
+_MODULE_REVIEW_RULES = """
+You are producing a CONCISE review study guide section for one module.
+
+Output markdown with EXACT structure:
+
+## <Module name exactly as given>
+### Module overview
+- <4-8 bullets (high-signal)>
+
+Then for EACH topic below:
+### <Topic>
+- <4-7 bullets>
+
+Rules:
+- Bullets must be short, high-signal (definition, key intuition/formula, common pitfall, when to use).
+- Avoid long paragraphs.
+- Do not include any content outside this structure.
+- Write formulas using LaTeX with proper delimiters: use \\( ... \\) inline and $$ ... $$ for display.
+- Do NOT wrap formulas in plain parentheses like "( ... )" unless those parentheses are part of the LaTeX itself.
+""".strip()
 
 def _ai_concise_module_review(module_name, topics):
     """
@@ -1902,23 +2912,56 @@ def _ai_concise_module_review(module_name, topics):
     topics = [t for t in (topics or []) if str(t or '').strip()]
     if not topics:
         return ''
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
     if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
         raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
 
     topic_list = "\n".join([f"- {t}" for t in topics])
+    dynamic = f"Module: {module_name}\n\nTopics:\n{topic_list}"
+
+    if groq_key and Groq is not None:
+        client = _get_groq_client()
+        return _groq_stream_text(client, [
+            {"role": "system", "content": _MODULE_REVIEW_RULES},
+            {"role": "user", "content": dynamic},
+        ], temperature=0.25, max_tokens=2200)
+    model = _get_gemini_model()
+    return _gemini_stream_text(model, _MODULE_REVIEW_RULES + "\n\n" + dynamic)
+
+def _ai_concise_multi_module_review(modules):
+    """
+    Batched counterpart of _ai_concise_module_review: renders several small
+    modules in ONE LLM call (one network roundtrip instead of one per module).
+    Returns {module_name: section_markdown}; callers fall back to individual
+    calls for any module missing from the parsed output.
+    """
+    modules = [(m, [t for t in (ts or []) if str(t or '').strip()]) for m, ts in (modules or [])]
+    modules = [(m, ts) for m, ts in modules if ts]
+    if not modules:
+        return {}
+    if len(modules) == 1:
+        mod, ts = modules[0]
+        return {mod: _ai_concise_module_review(mod, ts)}
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
+    if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
+        raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
+
+    blocks = []
+    for mod, ts in modules:
+        blocks.append(f"Module: {mod}\n" + "\n".join(f"- {t}" for t in ts))
+    module_blocks = "\n\n".join(blocks)
     prompt = f"""
-You are producing a CONCISE review study guide section for this module:
-Module: {module_name}
+You are producing CONCISE review study guide sections for SEVERAL modules at once.
 
-Output markdown with EXACT structure:
+For EACH module below, output markdown with EXACT structure:
 
-## {module_name}
+## <Module name exactly as given>
 ### Module overview
 - <4-8 bullets (high-signal)>
 
-Then for EACH topic below:
+Then for EACH topic of that module:
 ### <Topic>
 - <4-7 bullets>
 
@@ -1928,23 +2971,33 @@ Rules:
 - Do not include any content outside this structure.
 - Write formulas using LaTeX with proper delimiters: use \\( ... \\) inline and $$ ... $$ for display.
 - Do NOT wrap formulas in plain parentheses like "( ... )" unless those parentheses are part of the LaTeX itself.
+- Emit every module, in the order given, each starting with its "## " heading.
 
-Topics:
-{topic_list}
+{module_blocks}
 """.strip()
 
     if groq_key and Groq is not None:
-        client = Groq(api_key=groq_key)
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.25,
-            max_tokens=2200
-        )
-        return resp.choices[0].message.content.strip()
-    genai.configure(api_key=gemini_key)
-    model = genai.GenerativeModel('gemini-pro')
-    return (model.generate_content(prompt).text or '').strip()
+        client = _get_groq_client()
+        # Budget output by topic count, not module count: one big module
+        # needs as many tokens as several small ones.
+        total_topics = sum(len(ts) for _, ts in modules)
+        raw = _groq_stream_text(client, [{"role": "user", "content": prompt}],
+                                temperature=0.25,
+                                max_tokens=min(6000, max(1200, 150 * total_topics)))
+    else:
+        model = _get_gemini_model()
+        raw = _gemini_stream_text(model, prompt)
+
+    out = {}
+    by_norm = {_topic_key(m): m for m, _ in modules}
+    for sec in re.split(r'(?m)^##\s+', raw):
+        if not sec.strip():
+            continue
+        heading = sec.splitlines()[0].strip()
+        mod = by_norm.get(_topic_key(heading))
+        if mod and mod not in out:
+            out[mod] = "## " + sec.strip()
+    return out
 
 def _fetch_latest_drive_guide(kind=None, folder_id=None):
     return _fetch_latest_drive_guide_scoped(kind=kind, folder_id=folder_id, file_id=None)
@@ -2064,18 +3117,7 @@ def _fetch_latest_drive_guide_scoped(kind=None, folder_id=None, file_id=None):
             pass
         return None
 
-def _ai_generate_ds_mid_guide(topic_inventory_lines):
-    """
-    Produce a mid-level DS interview review guide from an inventory of topics.
-    Returns markdown.
-    """
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
-    if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
-        raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
-
-    inventory = "\n".join((topic_inventory_lines or [])[:220])
-    prompt = f"""
+_DS_MID_GUIDE_RULES = """
 You are writing a MID-LEVEL DATA SCIENCE interview study guide.
 Use the topic inventory (extracted from course PDFs + notebooks) as your source of truth.
 
@@ -2111,24 +3153,34 @@ Rules:
 - Don’t invent random topics not implied by the inventory; if something’s missing, skip it.
 - Write formulas using LaTeX with proper delimiters: use \\( ... \\) inline and $$ ... $$ for display.
 - Do NOT wrap formulas in plain parentheses like "( ... )" unless those parentheses are part of the LaTeX itself.
-
-Topic inventory:
-{inventory}
 """.strip()
 
+def _ai_generate_ds_mid_guide(topic_inventory_lines):
+    """
+    Produce a mid-level DS interview review guide from an inventory of topics.
+    Returns markdown.
+    """
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
+    if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
+        raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
+
+    inventory = "\n".join((topic_inventory_lines or [])[:220])
+    dynamic = f"Topic inventory:\n{inventory}"
+
     if groq_key and Groq is not None:
-        client = Groq(api_key=groq_key)
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=2600
-        )
-        return resp.choices[0].message.content.strip()
+        client = _get_groq_client()
+        return _groq_stream_text(client, [
+            {"role": "system", "content": _DS_MID_GUIDE_RULES},
+            {"role": "user", "content": dynamic},
+        ], temperature=0.2, max_tokens=2600)
+
+    model = _get_gemini_model()
+    return _gemini_stream_text(model, _DS_MID_GUIDE_RULES + "\n\n" + dynamic)
 
-    genai.configure(api_key=gemini_key)
-    model = genai.GenerativeModel('gemini-pro')
-    return (model.generate_content(prompt).text or '').strip()
+def _json_loads_fast(s):
+    """orjson.loads when available (2-5x faster on big payloads), else json."""
+    return orjson.loads(s) if orjson is not None else json.loads(s)
 
 def _parse_json_array_loose(text):
     """
@@ -2142,7 +3194,7 @@ def _parse_json_array_loose(text):
     s = re.sub(r'^\s*```(?:json)?\s*', '', s, flags=re.IGNORECASE)
     s = re.sub(r'\s*```\s*$', '', s)
     try:
-        obj = json.loads(s)
+        obj = _json_loads_fast(s)
         return obj if isinstance(obj, list) else []
     except Exception:
         pass
@@ -2151,12 +3203,32 @@ def _parse_json_array_loose(text):
         i = s.find('[')
         j = s.rfind(']')
         if i != -1 and j != -1 and j > i:
-            obj = json.loads(s[i:j+1])
+            obj = _json_loads_fast(s[i:j+1])
             return obj if isinstance(obj, list) else []
     except Exception:
         pass
     return []
 
+# Static flashcard instructions; keep ahead of the per-file payload so the
+# shared prefix stays byte-identical across calls (see _CONCISE_BULLETS_RULES).
+_FLASHCARD_RULES = """
+You are generating study flashcards from EXACT SOURCE MATERIAL.
+
+Rules (must follow):
+- ONLY use facts/definitions/formulas that are present in the excerpt below. Do NOT add outside knowledge.
+- If the excerpt is insufficient for a card, SKIP it.
+- NEVER output answers like "not answered in the excerpt" / "not provided" / "cannot be determined".
+- Make cards interview-friendly: crisp Q, precise A.
+- Use LaTeX for formulas with proper delimiters: \\( ... \\) inline and $$ ... $$ for display.
+- Output MUST be valid JSON: an array of objects with keys:
+  - "q": string
+  - "a": string
+  - "level": one of ["easy","medium","hard"]
+  - "source": string (use the SOURCE FILE)
+-  - "evidence": string (a SHORT verbatim quote copied from the excerpt that supports the answer; must appear in the excerpt)
+- No markdown, no commentary, no code fences.
+""".strip()
+
 def _ai_generate_flashcards_from_excerpt(excerpt, title_hint='', n_cards=8):
     """
     Generate flashcards strictly from provided excerpt.
@@ -2170,50 +3242,30 @@ def _ai_generate_flashcards_from_excerpt(excerpt, title_hint='', n_cards=8):
     if n_cards > 20:
         n_cards = 20
 
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
     if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
         raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
 
-    prompt = f"""
-You are generating study flashcards from EXACT SOURCE MATERIAL.
+    dynamic = f"""
+Return {n_cards} cards max.
 
 SOURCE FILE: {title_hint or "(unknown)"}
 
-Rules (must follow):
-- ONLY use facts/definitions/formulas that are present in the excerpt below. Do NOT add outside knowledge.
-- If the excerpt is insufficient for a card, SKIP it.
-- NEVER output answers like "not answered in the excerpt" / "not provided" / "cannot be determined".
-- Make cards interview-friendly: crisp Q, precise A.
-- Use LaTeX for formulas with proper delimiters: \\( ... \\) inline and $$ ... $$ for display.
-- Output MUST be valid JSON: an array of objects with keys:
-  - "q": string
-  - "a": string
-  - "level": one of ["easy","medium","hard"]
-  - "source": string (use the SOURCE FILE)
--  - "evidence": string (a SHORT verbatim quote copied from the excerpt that supports the answer; must appear in the excerpt)
-- No markdown, no commentary, no code fences.
-
-Return {n_cards} cards max.
-
 EXCERPT:
 {excerpt}
 """.strip()
 
     out_text = ''
     if groq_key and Groq is not None:
-        client = Groq(api_key=groq_key)
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=1600
-        )
-        out_text = (resp.choices[0].message.content or '').strip()
+        client = _get_groq_client()
+        out_text = _groq_stream_text(client, [
+            {"role": "system", "content": _FLASHCARD_RULES},
+            {"role": "user", "content": dynamic},
+        ], temperature=0.2, max_tokens=1600)
     else:
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel('gemini-pro')
-        out_text = (model.generate_content(prompt).text or '').strip()
+        model = _get_gemini_model()
+        out_text = _gemini_stream_text(model, _FLASHCARD_RULES + "\n\n" + dynamic)
 
     cards = _parse_json_array_loose(out_text)
     cleaned = []
@@ -2267,8 +3319,8 @@ def _ai_generate_file_notes_from_excerpt(excerpt, title_hint='', mode='notes', d
     excerpt = (excerpt or '').strip()
     if not excerpt:
         return ''
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
     if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
         raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
 
@@ -2439,7 +3491,7 @@ EXCERPT:
 
     def _run_llm(prompt_text, max_tokens):
         if groq_key and Groq is not None:
-            client = Groq(api_key=groq_key)
+            client = _get_groq_client()
             resp = client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[{"role": "user", "content": prompt_text}],
@@ -2447,9 +3499,8 @@ EXCERPT:
                 max_tokens=max_tokens
             )
             return (resp.choices[0].message.content or '').strip()
-        genai.configure(api_key=gemini_key)
-        model_obj = genai.GenerativeModel('gemini-pro')
-        return (model_obj.generate_content(prompt_text).text or '').strip()
+        model_obj = _get_gemini_model()
+        return (_gemini_generate_text(model_obj, prompt_text).text or '').strip()
 
     # 2-pass generation for Detailed/Deep dive: generate a concise base, then expand it.
     if is_detailed or is_deep:
@@ -2499,6 +3550,16 @@ BASE NOTES (do not delete; expand in-place):
 
     return _run_llm(prompt, max_tokens=1800)
 
+# In-process dedup for flashcard decks, keyed on a hash of the normalized
+# notes prefix + card count. Regenerating a deck from unchanged notes (or a
+# near-identical copy of the same notes) skips the LLM call entirely.
+_FLASHCARD_DECK_CACHE = {}
+_FLASHCARD_DECK_CACHE_MAX = 64
+
+def _flashcard_deck_key(notes, n_cards):
+    prefix = _WS_RE.sub(' ', notes[:2048].lower())
+    return hashlib.sha256(f"{prefix}|{n_cards}".encode('utf-8', 'ignore')).hexdigest()
+
 def _ai_generate_flashcards_from_notes(notes_markdown, title_hint='', n_cards=24):
     """
     Generate flashcards from ALREADY GENERATED notes markdown.
@@ -2513,8 +3574,13 @@ def _ai_generate_flashcards_from_notes(notes_markdown, title_hint='', n_cards=24
     if n_cards > 80:
         n_cards = 80
 
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    gemini_key = os.environ.get('GOOGLE_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    deck_key = _flashcard_deck_key(notes, n_cards)
+    cached = _FLASHCARD_DECK_CACHE.get(deck_key)
+    if cached is not None:
+        return [dict(c) for c in cached]
+
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
     if not ((groq_key and Groq is not None) or (gemini_key and genai is not None)):
         raise Exception('No AI API key configured (set GROQ_API_KEY or GOOGLE_API_KEY).')
 
@@ -2542,18 +3608,12 @@ NOTES:
 
     out_text = ''
     if groq_key and Groq is not None:
-        client = Groq(api_key=groq_key)
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=2000
-        )
-        out_text = (resp.choices[0].message.content or '').strip()
+        client = _get_groq_client()
+        out_text = _groq_stream_text(client, [{"role": "user", "content": prompt}],
+                                     temperature=0.2, max_tokens=2000)
     else:
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel('gemini-pro')
-        out_text = (model.generate_content(prompt).text or '').strip()
+        model = _get_gemini_model()
+        out_text = _gemini_stream_text(model, prompt)
 
     cards = _parse_json_array_loose(out_text)
     cleaned = []
@@ -2587,8 +3647,17 @@ NOTES:
         if evidence.lower() not in notes_lc:
             continue
         cleaned.append({'q': q, 'a': a, 'level': level, 'source': source, 'evidence': evidence})
+    if cleaned:
+        while len(_FLASHCARD_DECK_CACHE) >= _FLASHCARD_DECK_CACHE_MAX:
+            _FLASHCARD_DECK_CACHE.pop(next(iter(_FLASHCARD_DECK_CACHE)))
+        _FLASHCARD_DECK_CACHE[deck_key] = [dict(c) for c in cleaned]
     return cleaned
 
+# Compiled once: the delimiter normalizer walks entire generated guides
+# (tens of KB) and fires these on every parenthesis group.
+_LATEX_CMD_RE = re.compile(r'\\[A-Za-z]+')
+_PAREN_NON_NESTED_RE = re.compile(r'\(\s*([^()]*)\s*\)')
+
 def _normalize_math_delimiters_backend(markdown):
     """
     Normalize common LLM output like:
@@ -2602,6 +3671,11 @@ def _normalize_math_delimiters_backend(markdown):
         return markdown
     s = str(markdown)
 
+    # Fast path: every rewrite below needs a backslash, "_" or "^" somewhere
+    # in the text, so a clean document skips the regex walk entirely.
+    if '\\' not in s and '_' not in s and '^' not in s:
+        return s
+
     # Collapse double-escaped KaTeX delimiters (common in LLM output):
     # "\\(" -> "\(" and similarly for "\)", "\[", "\]".
     s = s.replace('\\\\(', '\\(').replace('\\\\)', '\\)')
@@ -2612,7 +3686,7 @@ def _normalize_math_delimiters_backend(markdown):
             return False
         if ('\\left' in inner) or ('\\right' in inner):
             return False
-        return bool(re.search(r'\\[A-Za-z]+', inner) or re.search(r'[_^]', inner))
+        return bool(_LATEX_CMD_RE.search(inner)) or '_' in inner or '^' in inner
 
     # 1) Safe replacement for NON-NESTED parentheses only: "( ... )" where "..." contains no other parentheses.
     # This avoids truncating expressions like "( \\text{...} = (a+b) \\times c )".
@@ -2622,7 +3696,7 @@ def _normalize_math_delimiters_backend(markdown):
             return m.group(0)
         return f"\\( {inner} \\)"
 
-    s = re.sub(r'\(\s*([^()]*)\s*\)', repl_non_nested, s)
+    s = _PAREN_NON_NESTED_RE.sub(repl_non_nested, s)
 
     # 2) Whole-line wrapper: if a line starts with "(" and ends with ")" and looks LaTeX-like,
     # wrap the entire inside (handles nested parentheses safely at the line level).
@@ -2649,6 +3723,12 @@ def drive_guide_latest():
         return jsonify({'error': 'No guide generated yet'}), 404
     return jsonify(guide)
 
+# Markdown heading patterns for slicing generated guides into sections.
+# NOTE: these previously used r'^###\\s+' (literal backslash-s), so the split
+# never matched and per-topic summary caching was silently dead.
+_H2_HEADING_RE = re.compile(r'(?m)^##\s+')
+_H3_SPLIT_RE = re.compile(r'(?m)^###\s+')
+
 @app.route('/api/drive/guide/generate', methods=['POST'])
 @drive_login_required
 def drive_guide_generate():
@@ -2695,13 +3775,13 @@ def drive_guide_generate():
 
     module_topics = {}  # module -> {topic_key: {'title': str, 'count': int}}
     for r in rows:
-        raw = dict(r).get('extracted_topics_json') if USE_POSTGRESQL else r[0]
-        path = dict(r).get('path') if USE_POSTGRESQL else r[1]
-        name = dict(r).get('name') if USE_POSTGRESQL else r[2]
+        raw = db_col(r, 0, 'extracted_topics_json')
+        path = db_col(r, 1, 'path')
+        name = db_col(r, 2, 'name')
         if not raw:
             continue
         try:
-            obj = json.loads(raw)
+            obj = _json_loads_fast(raw)
             topics = obj.get('topics') or []
         except Exception:
             topics = []
@@ -2709,14 +3789,18 @@ def drive_guide_generate():
         bucket = module_topics.setdefault(mod, {})
         for t in topics:
             s = str(t or '').strip()
-            if not s or _is_noise_topic(s):
+            if not s:
                 continue
+            # Normalize once per topic; the noise check and the bucket key
+            # both reuse it. One .get() instead of membership + two lookups.
             k = _topic_key(s)
-            if not k:
+            if not k or _is_noise_topic_key(k):
                 continue
-            if k not in bucket:
-                bucket[k] = {'title': s, 'count': 0}
-            bucket[k]['count'] += 1
+            entry = bucket.get(k)
+            if entry is None:
+                bucket[k] = {'title': s, 'count': 1}
+            else:
+                entry['count'] += 1
 
     if not module_topics:
         return jsonify({'error': 'No extracted topics found yet. Run Extract Topics first.'}), 400
@@ -2726,9 +3810,12 @@ def drive_guide_generate():
     module_payload = []
     total_topics = 0
     for mod in ordered_modules:
-        items = list(module_topics[mod].values())
-        items.sort(key=lambda x: (-int(x.get('count') or 0), str(x.get('title') or '')))
-        titles = [it['title'] for it in items][:60]
+        # Top-60 by frequency; nsmallest is O(n log 60) vs a full sort's
+        # O(n log n) when a module has hundreds of noisy topics.
+        items = heapq.nsmallest(
+            60, module_topics[mod].values(),
+            key=lambda x: (-int(x.get('count') or 0), str(x.get('title') or '')))
+        titles = [it['title'] for it in items]
         if not titles:
             continue
         module_payload.append((mod, titles))
@@ -2757,6 +3844,9 @@ def drive_guide_generate():
         # Build guide module-by-module (more coherent than a flat topic dump).
         sections = []
         toc_lines = []
+        # First pass: probe the per-topic cache and record what each module
+        # still needs from the LLM.
+        module_plans = []  # (mod, cached_sections, missing)
         for mod, topics in module_payload:
             toc_lines.append(f"- {mod}")
             for t in topics[:35]:
@@ -2767,20 +3857,48 @@ def drive_guide_generate():
             for t in topics[:35]:
                 cached = _get_drive_topic_summary(t)
                 if cached:
-                    cached_sections.append(re.sub(r'(?m)^##\\s+', '### ', cached.strip(), count=1))
+                    cached_sections.append(_H2_HEADING_RE.sub('### ', cached.strip(), count=1))
                 else:
                     missing.append(t)
+            module_plans.append((mod, cached_sections, missing))
+
+        # Coalesce modules into shared LLM calls: each call otherwise costs a
+        # full network roundtrip plus queueing, so pack modules greedily into
+        # batches bounded by topic count (output budget) and module count
+        # (parse reliability). Most guides collapse to one or two calls.
+        batched_results = {}
+        pending = [(mod, missing[:18]) for mod, _, missing in module_plans if missing]
+        batches = []
+        batch, batch_topics = [], 0
+        for mod, ts in pending:
+            if batch and (batch_topics + len(ts) > 30 or len(batch) >= 6):
+                batches.append(batch)
+                batch, batch_topics = [], 0
+            batch.append((mod, ts))
+            batch_topics += len(ts)
+        if batch:
+            batches.append(batch)
+        for b in batches:
+            try:
+                batched_results.update(_ai_concise_multi_module_review(b))
+            except Exception:
+                pass  # fall back to individual calls below
 
-            module_md = _ai_concise_module_review(mod, missing[:18]) if missing else f"## {mod}\n### Module overview\n- (topics already summarized from cache)\n"
+        summary_pairs = []
+        for mod, cached_sections, missing in module_plans:
+            if missing:
+                module_md = batched_results.get(mod) or _ai_concise_module_review(mod, missing[:18])
+            else:
+                module_md = f"## {mod}\n### Module overview\n- (topics already summarized from cache)\n"
 
-            parts = re.split(r'(?m)^###\\s+', module_md.strip())
+            parts = _H3_SPLIT_RE.split(module_md.strip())
             for p in parts:
                 if not p.strip():
                     continue
                 sec = "### " + p.strip()
                 heading = sec.splitlines()[0].replace('###', '').strip()
                 if heading and heading.lower() not in ('module overview',):
-                    _set_drive_topic_summary(heading, re.sub(r'(?m)^###\\s+', '## ', sec, count=1))
+                    summary_pairs.append((heading, _H3_SPLIT_RE.sub('## ', sec, count=1)))
 
             if not module_md.lstrip().startswith(f"## {mod}"):
                 module_md = f"## {mod}\n" + module_md
@@ -2788,10 +3906,22 @@ def drive_guide_generate():
             if cached_sections:
                 sections.append("\n".join(cached_sections).strip())
 
-        header = f"# Concise Course Review Guide (Drive)\n\nGenerated: {created_at}\n\n"
-        intro = "Concise, high-signal review notes to refresh core concepts quickly.\n\n"
-        toc = "## Table of contents\n" + "\n".join(toc_lines) + "\n\n"
-        content = header + intro + toc + "\n\n".join(sections).strip() + "\n"
+        # One transaction for all per-topic summaries instead of one per topic.
+        try:
+            _set_drive_topic_summaries_bulk(summary_pairs)
+        except Exception:
+            pass  # cache writes are best-effort
+
+        # Assemble from a list with one join; repeated += on multi-KB strings
+        # would reallocate the whole document per piece.
+        parts = [
+            f"# Concise Course Review Guide (Drive)\n\nGenerated: {created_at}\n\n",
+            "Concise, high-signal review notes to refresh core concepts quickly.\n\n",
+            "## Table of contents\n" + "\n".join(toc_lines) + "\n\n",
+            "\n\n".join(sections).strip(),
+            "\n",
+        ]
+        content = "".join(parts)
 
     # Safety-net: normalize common "( \\latex ... )" into "\\( ... \\)" so KaTeX renders reliably.
     content = _normalize_math_delimiters_backend(content)
@@ -2875,21 +4005,10 @@ def drive_flashcards_generate():
     try:
         now = deck_obj['created_at']
         deck_json = json.dumps(deck_obj, ensure_ascii=False)
-        if USE_POSTGRESQL:
-            cur = db_execute(conn, '''
-                INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
-                VALUES (%s, NULL, %s, %s, %s)
-                RETURNING id
-            ''', (folder_id, kind, deck_json, now))
-            row = db_fetchone(cur)
-            cur.close()
-            deck_id = dict(row).get('id') if row else None
-        else:
-            cur = db_execute(conn, '''
-                INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
-                VALUES (?, NULL, ?, ?, ?)
-            ''', (folder_id, kind, deck_json, now))
-            deck_id = cur.lastrowid
+        deck_id = db_execute_returning_id(conn, '''
+            INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
+            VALUES (?, NULL, ?, ?, ?)
+        ''', (folder_id, kind, deck_json, now))
         conn.commit()
     finally:
         conn.close()
@@ -2986,21 +4105,10 @@ def drive_file_flashcards_generate():
     try:
         now = deck_obj['created_at']
         deck_json = json.dumps(deck_obj, ensure_ascii=False)
-        if USE_POSTGRESQL:
-            cur = db_execute(conn, '''
-                INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
-                VALUES (NULL, %s, %s, %s, %s)
-                RETURNING id
-            ''', (file_id, kind, deck_json, now))
-            row = db_fetchone(cur)
-            cur.close()
-            deck_id = dict(row).get('id') if row else None
-        else:
-            cur = db_execute(conn, '''
-                INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
-                VALUES (NULL, ?, ?, ?, ?)
-            ''', (file_id, kind, deck_json, now))
-            deck_id = cur.lastrowid
+        deck_id = db_execute_returning_id(conn, '''
+            INSERT INTO drive_flashcard_decks (folder_id, file_id, kind, deck_json, created_at)
+            VALUES (NULL, ?, ?, ?, ?)
+        ''', (file_id, kind, deck_json, now))
         conn.commit()
     finally:
         conn.close()
@@ -3068,123 +4176,38 @@ def drive_file_guide_generate():
 def _fetch_latest_flashcard_deck(kind=None, folder_id=None):
     return _fetch_latest_flashcard_deck_scoped(kind=kind, folder_id=folder_id, file_id=None)
 
+_DECK_LATEST_SQL_SQLITE = '''
+    SELECT id, folder_id, file_id, kind, deck_json, created_at
+    FROM drive_flashcard_decks
+    WHERE (? IS NULL OR kind = ?)
+      AND (? IS NULL OR folder_id = ?)
+      AND (? IS NULL OR file_id = ?)
+    ORDER BY created_at DESC
+    LIMIT 1
+'''
+
 def _fetch_latest_flashcard_deck_scoped(kind=None, folder_id=None, file_id=None):
-    conn = get_db()
+    # One parameterized statement replaces the old six-way SQL ladder; SQLite
+    # reuses it from the per-connection statement cache and Postgres runs it
+    # as a server-side prepared statement (no parse/plan on repeat calls).
+    if file_id:
+        # file scoping supersedes folder scoping (matches the old branch order)
+        folder_id = None
+    # closing() releases the connection on every exit path (Postgres close()
+    # returns the connection to the pool) without hand-rolled cleanup.
     try:
-        if USE_POSTGRESQL:
-            if kind and file_id:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    WHERE kind = %s AND file_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''', (kind, file_id))
-            elif kind and folder_id:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    WHERE kind = %s AND folder_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''', (kind, folder_id))
-            elif kind:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    WHERE kind = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''', (kind,))
-            elif file_id:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    WHERE file_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''', (file_id,))
-            elif folder_id:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    WHERE folder_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''', (folder_id,))
+        with closing(get_db()) as conn:
+            if USE_POSTGRESQL:
+                with closing(_pg_execute_prepared(conn, 'fetch_latest_deck_stmt', (kind, folder_id, file_id))) as cur:
+                    row = db_fetchone(cur)
             else:
-                cur = db_execute(conn, '''
-                    SELECT id, folder_id, kind, deck_json, created_at
-                    FROM drive_flashcard_decks
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                ''')
-            row = db_fetchone(cur)
-            cur.close()
-            conn.close()
-            if not row:
-                return None
-            d = dict(row)
-            return {'id': d.get('id'), 'folder_id': d.get('folder_id'), 'file_id': d.get('file_id'), 'kind': d.get('kind'), 'deck_json': d.get('deck_json'), 'created_at': d.get('created_at')}
-        # SQLite
-        if kind and file_id:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                WHERE kind = ? AND file_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (kind, file_id))
-        elif kind and folder_id:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                WHERE kind = ? AND folder_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (kind, folder_id))
-        elif kind:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                WHERE kind = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (kind,))
-        elif file_id:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                WHERE file_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (file_id,))
-        elif folder_id:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                WHERE folder_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (folder_id,))
-        else:
-            cur = db_execute(conn, '''
-                SELECT id, folder_id, file_id, kind, deck_json, created_at
-                FROM drive_flashcard_decks
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''')
-        row = db_fetchone(cur)
-        conn.close()
-        if not row:
-            return None
-        return {'id': row[0], 'folder_id': row[1], 'file_id': row[2], 'kind': row[3], 'deck_json': row[4], 'created_at': row[5]}
+                row = db_fetchone(db_execute(conn, _DECK_LATEST_SQL_SQLITE,
+                                             (kind, kind, folder_id, folder_id, file_id, file_id)))
     except Exception:
-        try:
-            conn.close()
-        except Exception:
-            pass
         return None
+    if not row:
+        return None
+    return {'id': row[0], 'folder_id': row[1], 'file_id': row[2], 'kind': row[3], 'deck_json': row[4], 'created_at': row[5]}
 
 @app.route('/api/drive/flashcards/latest', methods=['GET'])
 @drive_login_required
@@ -3195,7 +4218,9 @@ def drive_flashcards_latest():
     deck = _fetch_latest_flashcard_deck_scoped(kind=kind, folder_id=folder_id, file_id=file_id)
     if not deck:
         return jsonify({'error': 'No flashcard deck generated yet'}), 404
-    return jsonify(deck)
+    # deck_json is a multi-KB string; orjson escapes it far faster than
+    # stdlib json's ensure_ascii pass. The payload shape is unchanged.
+    return ojsonify(deck)
 
 @app.route('/drive/flashcards/view/latest', methods=['GET'])
 @drive_login_required
@@ -3207,28 +4232,97 @@ def drive_flashcards_view_latest():
     if not deck:
         return "No flashcard deck generated yet.", 404
     try:
-        obj = json.loads(deck.get('deck_json') or '{}')
+        obj = _json_loads_fast(deck.get('deck_json') or '{}')
     except Exception:
         obj = {'cards': []}
     return render_template('drive_flashcards_view.html', deck=obj)
 
+# Browsers ask for this on every page load; a far-future Cache-Control on the
+# empty 204 makes them stop asking, and the shared Response skips rebuilding
+# the same object per hit.
+_FAVICON_RESP = Response(b'', status=204,
+                         headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+
 @app.route('/favicon.ico')
 def favicon():
     # Return 204 No Content to prevent 404 errors
-    return '', 204
+    return _FAVICON_RESP
+
+_TOPICS_CONFIG_CACHE = {'stamp': None, 'body': None}
 
 @app.route('/api/topics', methods=['GET'])
 def get_topics_config():
-    """Get topics configuration from JSON file"""
-    try:
-        with open('topics.json', 'r') as f:
-            data = json.load(f)
-            return jsonify(data)
+    """Get topics configuration from JSON file.
+
+    The file is requested on nearly every page load but only changes through
+    save_topics_config, so cache the raw bytes keyed on (mtime, size) and
+    serve them verbatim — no read, no parse, no re-serialization on hits.
+    """
+    try:
+        st = os.stat('topics.json')
+        stamp = (st.st_mtime_ns, st.st_size)
+        if _TOPICS_CONFIG_CACHE.get('stamp') == stamp:
+            return Response(_TOPICS_CONFIG_CACHE['body'], mimetype='application/json')
+        with open('topics.json', 'rb') as f:
+            raw = f.read()
+        # Validate before caching; the raw file bytes are the response payload.
+        orjson.loads(raw) if orjson is not None else json.loads(raw)
+        _TOPICS_CONFIG_CACHE['stamp'] = stamp
+        _TOPICS_CONFIG_CACHE['body'] = raw
+        return Response(raw, mimetype='application/json')
     except FileNotFoundError:
         return jsonify({'categories': [], 'uncategorized_topics': []})
-    except json.JSONDecodeError:
+    except ValueError:
+        # orjson.JSONDecodeError and json.JSONDecodeError both subclass ValueError
         return jsonify({'error': 'Invalid JSON file'}), 500
 
+TOPICS_JOURNAL = 'topics.journal'
+_TOPICS_JOURNAL_MAX_ENTRIES = 50
+
+def _topics_reverse_diff(old, new):
+    """
+    Minimal undo record between two topics configs: for each top-level key that
+    changed or was removed, store the OLD value; also list keys that were added.
+    Applying the diff onto the new snapshot reconstructs the old one.
+    """
+    old = old if isinstance(old, dict) else {}
+    new = new if isinstance(new, dict) else {}
+    changed = {k: v for k, v in old.items() if new.get(k) != v}
+    added = [k for k in new.keys() if k not in old]
+    return {'changed': changed, 'added': added}
+
+def _append_topics_journal(old_data, new_data):
+    """
+    Append an undo record for a topics.json save (single small append + fsync
+    instead of rewriting the whole previous file as a .backup copy).
+    Compacts the journal once it grows past _TOPICS_JOURNAL_MAX_ENTRIES.
+    """
+    try:
+        record = {
+            'ts': datetime.now(timezone.utc).isoformat(),
+            'diff': _topics_reverse_diff(old_data, new_data),
+        }
+        if orjson is not None:
+            line = orjson.dumps(record).decode('utf-8')
+        else:
+            line = json.dumps(record, ensure_ascii=False)
+        with open(TOPICS_JOURNAL, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            try:
+                os.fdatasync(f.fileno())
+            except (AttributeError, OSError):
+                pass
+        # Occasional compaction: keep only the most recent half once we exceed the cap.
+        with open(TOPICS_JOURNAL, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) > _TOPICS_JOURNAL_MAX_ENTRIES:
+            with open(TOPICS_JOURNAL, 'w', encoding='utf-8') as f:
+                f.writelines(lines[-(_TOPICS_JOURNAL_MAX_ENTRIES // 2):])
+    except Exception:
+        # Journaling is best-effort; never fail the save because of it.
+        pass
+
 @app.route('/api/topics', methods=['POST'])
 @login_required
 def save_topics_config():
@@ -3238,18 +4332,26 @@ def save_topics_config():
         # Validate structure
         if 'categories' not in data:
             return jsonify({'error': 'Missing categories field'}), 400
-        
-        # Backup existing file
-        import shutil
+
+        # Journal an undo record instead of copying the whole previous file
+        # (the full-file .backup copy doubled write traffic on every save).
         try:
-            shutil.copy('topics.json', 'topics.json.backup')
-        except:
-            pass  # No backup if file doesn't exist
-        
-        # Write new data
-        with open('topics.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        
+            with open('topics.json', 'rb') as f:
+                raw = f.read()
+            old_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except Exception:
+            old_data = None  # No journal entry if file doesn't exist yet
+        if old_data is not None:
+            _append_topics_journal(old_data, data)
+
+        # Write new data (topics.json stays the committed snapshot readers use)
+        if orjson is not None:
+            with open('topics.json', 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open('topics.json', 'w') as f:
+                json.dump(data, f, indent=2)
+
         return jsonify({'message': 'Topics configuration saved successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3261,7 +4363,8 @@ def get_admin_settings():
     # Defaults
     flashcards_count = int(get_setting('flashcards_count', '15') or 15)
     return jsonify({
-        'flashcards_count': flashcards_count
+        'flashcards_count': flashcards_count,
+        'llm_request_timeout': _llm_timeout()
     })
 
 @app.route('/api/admin/settings', methods=['POST'])
@@ -3278,40 +4381,72 @@ def update_admin_settings():
             set_setting('flashcards_count', str(val))
         except Exception:
             return jsonify({'error': 'flashcards_count must be an integer'}), 400
+    if 'llm_request_timeout' in data:
+        try:
+            val = float(data.get('llm_request_timeout'))
+            # Keep it sane
+            if val < 5 or val > 120:
+                return jsonify({'error': 'llm_request_timeout must be between 5 and 120 seconds'}), 400
+            set_setting('llm_request_timeout', str(val))
+        except Exception:
+            return jsonify({'error': 'llm_request_timeout must be a number'}), 400
     return jsonify({'message': 'Settings saved'})
 
+# The key/availability probe can't change under a running process except via
+# environment edits, so serve a cached body for 60s between rebuilds.
+_CHECK_KEY_CACHE = {'ts': 0.0, 'body': None}
+
 @app.route('/api/debug/check-key', methods=['GET'])
 def check_api_key():
     """Debug endpoint to check if API key is accessible"""
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    return jsonify({
+    now = time.time()
+    if _CHECK_KEY_CACHE['body'] is not None and now - _CHECK_KEY_CACHE['ts'] < 60:
+        return Response(_CHECK_KEY_CACHE['body'], mimetype='application/json')
+    groq_key = os.getenv('GROQ_API_KEY')
+    body = json.dumps({
         'has_groq_key': bool(groq_key),
         'key_length': len(groq_key) if groq_key else 0,
         'key_prefix': groq_key[:10] + '...' if groq_key else None,
         'groq_available': Groq is not None
     })
+    _CHECK_KEY_CACHE['ts'] = now
+    _CHECK_KEY_CACHE['body'] = body
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/interviews', methods=['GET'])
 def get_interviews():
     try:
         conn = get_db()
-        # PostgreSQL requires all non-aggregated columns in GROUP BY
+        # PostgreSQL: aggregate straight to a JSON array server-side and ship the
+        # text verbatim — no Python row-to-dict loop and no re-serialization.
         if USE_POSTGRESQL:
             cursor = db_execute(conn, '''
-                SELECT i.id, i.company, i.position, i.interview_date, i.created_at, i.status,
-                       COUNT(DISTINCT t.id) as topic_count,
-                       COUNT(DISTINCT CASE WHEN t.status = 'completed' THEN t.id END) as completed_topics
-                FROM interviews i
-                LEFT JOIN topics t ON i.id = t.interview_id
-                WHERE i.status = 'active'
-                GROUP BY i.id, i.company, i.position, i.interview_date, i.created_at, i.status
-                ORDER BY CASE WHEN i.interview_date IS NULL THEN 1 ELSE 0 END, i.interview_date ASC, i.created_at DESC
-            ''')
+                SELECT COALESCE(json_agg(row_to_json(x) ORDER BY
+                           (x.interview_date IS NULL), x.interview_date ASC, x.created_at DESC
+                       ), '[]'::json)::text
+                FROM (
+                    SELECT i.id, i.company, i.position, i.interview_date, i.created_at, i.status,
+                           COUNT(t.id) as topic_count,
+                           COUNT(t.id) FILTER (WHERE t.status = 'completed') as completed_topics
+                    FROM interviews i
+                    LEFT JOIN topics t ON i.id = t.interview_id
+                    WHERE i.status = 'active'
+                    GROUP BY i.id, i.company, i.position, i.interview_date, i.created_at, i.status
+                ) x
+            ''', ())
+            row = db_fetchone(cursor)
+            cursor.close()
+            conn.close()
+            payload = None
+            if row:
+                # RealDictCursor: single anonymous column; take its value.
+                payload = next(iter(dict(row).values()), None)
+            return Response(payload or '[]', mimetype='application/json')
         else:
             cursor = db_execute(conn, '''
-                SELECT i.*, 
-                       COUNT(DISTINCT t.id) as topic_count,
-                       COUNT(DISTINCT CASE WHEN t.status = 'completed' THEN t.id END) as completed_topics
+                SELECT i.*,
+                       COUNT(t.id) as topic_count,
+                       SUM(CASE WHEN t.status = 'completed' THEN 1 ELSE 0 END) as completed_topics
                 FROM interviews i
                 LEFT JOIN topics t ON i.id = t.interview_id
                 WHERE i.status = 'active'
@@ -3325,9 +4460,8 @@ def get_interviews():
         
         # Always return an array, even if empty
         result = [dict(row) for row in interviews] if interviews else []
-        return jsonify(result)
+        return ojsonify(result)
     except Exception as e:
-        import traceback
         error_msg = str(e)
         traceback.print_exc()
         print(f"Error in get_interviews: {error_msg}")
@@ -3353,23 +4487,11 @@ def create_interview():
         
         conn = get_db()
         try:
-            if USE_POSTGRESQL:
-                cursor = db_execute(conn, '''
-                    INSERT INTO interviews (company, position, interview_date, created_at)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                ''', (company, data.get('position', ''), 
-                      interview_date if interview_date else None, datetime.now().isoformat()))
-                result = db_fetchone(cursor)
-                interview_id = result['id'] if result else None
-                cursor.close()
-            else:
-                cursor = db_execute(conn, '''
-                    INSERT INTO interviews (company, position, interview_date, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (company, data.get('position', ''), 
-                      interview_date if interview_date else None, datetime.now().isoformat()))
-                interview_id = db_lastrowid(cursor, conn)
+            interview_id = db_execute_returning_id(conn, '''
+                INSERT INTO interviews (company, position, interview_date, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (company, data.get('position', ''),
+                  interview_date if interview_date else None, datetime.now().isoformat()))
             conn.commit()
             conn.close()
             
@@ -3381,7 +4503,6 @@ def create_interview():
             conn.close()
             raise db_error
     except Exception as e:
-        import traceback
         error_msg = str(e)
         traceback.print_exc()
         print(f"Error in create_interview: {error_msg}")
@@ -3390,22 +4511,31 @@ def create_interview():
 
 @app.route('/api/interviews/<int:interview_id>', methods=['GET'])
 def get_interview(interview_id):
-    conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
-    interview = db_fetchone(cursor)
-    if USE_POSTGRESQL:
-        cursor.close()
-    if not interview:
-        conn.close()
-        return jsonify({'error': 'Study material not found'}), 404
-    
-    cursor = db_execute(conn, 'SELECT * FROM topics WHERE interview_id = ? ORDER BY COALESCE(category_name, \'\'), priority DESC, topic_name ASC', 
-                         (interview_id,))
-    topics = db_fetchall(cursor)
-    if USE_POSTGRESQL:
-        cursor.close()
-    conn.close()
-    
+    # closing() guarantees the connection goes back on every exit path,
+    # including the 404 return and exceptions between the two queries.
+    with closing(get_db()) as conn:
+        cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
+        interview = db_fetchone(cursor)
+        if USE_POSTGRESQL:
+            cursor.close()
+        if not interview:
+            return jsonify({'error': 'Study material not found'}), 404
+
+        # The ai_guidance/ai_notes markdown blobs (multi-KB per topic) ship by
+        # default because the frontend renders and exports from them; clients
+        # that only need the topic list can pass ?exclude=guidance to slim the
+        # payload.
+        exclude = (request.args.get('exclude') or '').strip().lower()
+        if 'guidance' in exclude:
+            topic_cols = 'id, interview_id, topic_name, category_name, priority, status, notes'
+        else:
+            topic_cols = '*'
+        cursor = db_execute(conn, f'SELECT {topic_cols} FROM topics WHERE interview_id = ? ORDER BY COALESCE(category_name, \'\'), priority DESC, topic_name ASC',
+                             (interview_id,))
+        topics = db_fetchall(cursor)
+        if USE_POSTGRESQL:
+            cursor.close()
+
     interview_dict = dict(interview)
     # Convert topics to dicts and ensure no None values become strings
     topics_list = []
@@ -3420,39 +4550,70 @@ def get_interview(interview_id):
 
 @app.route('/api/interviews/<int:interview_id>', methods=['DELETE'])
 def delete_interview(interview_id):
-    conn = get_db()
-    # Check if interview exists
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
-    interview = db_fetchone(cursor)
-    if USE_POSTGRESQL:
-        cursor.close()
-    if not interview:
-        conn.close()
+    # No existence pre-check: the DELETEs are no-ops for a missing id and the
+    # final statement's rowcount tells us whether anything was there.
+    with closing(get_db()) as conn:
+        # Delete all related topics first (due to foreign key)
+        cursor = db_execute(conn, 'DELETE FROM topics WHERE interview_id = ?', (interview_id,))
+        if USE_POSTGRESQL:
+            cursor.close()
+        # Delete study sessions
+        cursor = db_execute(conn, 'DELETE FROM study_sessions WHERE interview_id = ?', (interview_id,))
+        if USE_POSTGRESQL:
+            cursor.close()
+        # Delete the interview
+        cursor = db_execute(conn, 'DELETE FROM interviews WHERE id = ?', (interview_id,))
+        deleted = cursor.rowcount
+        if USE_POSTGRESQL:
+            cursor.close()
+        conn.commit()
+    if not deleted:
         return jsonify({'error': 'Study material not found'}), 404
-    
-    # Delete all related topics first (due to foreign key)
-    cursor = db_execute(conn, 'DELETE FROM topics WHERE interview_id = ?', (interview_id,))
-    if USE_POSTGRESQL:
-        cursor.close()
-    # Delete study sessions
-    cursor = db_execute(conn, 'DELETE FROM study_sessions WHERE interview_id = ?', (interview_id,))
-    if USE_POSTGRESQL:
-        cursor.close()
-    # Delete the interview
-    cursor = db_execute(conn, 'DELETE FROM interviews WHERE id = ?', (interview_id,))
-    if USE_POSTGRESQL:
-        cursor.close()
-    conn.commit()
-    conn.close()
     return jsonify({'message': 'Study material deleted successfully'})
 
+def _insert_topics_bulk(conn, interview_id, topics):
+    """Insert generated topics in one statement instead of one INSERT each.
+
+    Returns (topic_ids, hydrate_rows) matching the order of `topics`.
+    Bulk loads here are always dozens of rows; per-row round-trips to a
+    remote Postgres dominate the endpoint's latency otherwise.
+    """
+    rows = [(interview_id, t['name'], t.get('category', None),
+             t.get('priority', 'medium'), t.get('notes', '')) for t in topics]
+    if not rows:
+        return [], []
+    if USE_POSTGRESQL:
+        cur = conn.cursor()
+        returned = execute_values(cur, '''
+            INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
+            VALUES %s
+            RETURNING id
+        ''', rows, page_size=500, fetch=True)
+        cur.close()
+        topic_ids = [r[0] for r in returned]
+    else:
+        cur = conn.executemany('''
+            INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        # executemany has no usable lastrowid; the rows were just inserted in
+        # order, so the newest len(rows) ids for this interview are ours.
+        fetched = conn.execute(
+            'SELECT id FROM topics WHERE interview_id = ? ORDER BY id DESC LIMIT ?',
+            (interview_id, len(rows))).fetchall()
+        topic_ids = [r[0] for r in reversed(fetched)]
+    hydrate_rows = [(tid, t['name'], t.get('category', None))
+                    for tid, t in zip(topic_ids, topics) if tid]
+    return topic_ids, hydrate_rows
+
 @app.route('/api/interviews/<int:interview_id>/topics', methods=['POST'])
 def add_topic(interview_id):
     data = request.json
     topic_name = data.get('topic_name', '').strip()
     
     conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
+    # Only position is used from the row; don't ship every column for a check.
+    cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (interview_id,))
     interview = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
@@ -3464,117 +4625,70 @@ def add_topic(interview_id):
 
     # If topic name is blank, generate common topics for the position
     if not topic_name:
-        topics = generate_common_topics(position)
-        topic_ids = []
-        for topic in topics:
-            if USE_POSTGRESQL:
-                cursor = db_execute(conn, '''
-                    INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-                    VALUES (%s, %s, %s, %s, %s)
-                    RETURNING id
-                ''', (interview_id, topic['name'], topic.get('category', None), 
-                      topic.get('priority', 'medium'), topic.get('notes', '')))
-                result = db_fetchone(cursor)
-                new_id = result['id'] if result else None
-                topic_ids.append(new_id)
-                if new_id:
-                    _hydrate_topic_ai_from_cache(conn, new_id, position, topic['name'], topic.get('category', None))
-                cursor.close()
-            else:
-                cursor = db_execute(conn, '''
-                    INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (interview_id, topic['name'], topic.get('category', None), 
-                      topic.get('priority', 'medium'), topic.get('notes', '')))
-                new_id = db_lastrowid(cursor, conn)
-                topic_ids.append(new_id)
-                if new_id:
-                    _hydrate_topic_ai_from_cache(conn, new_id, position, topic['name'], topic.get('category', None))
+        force = bool(data.get('force')) or str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
+        topics = generate_common_topics(position, force=force)
+        topic_ids, hydrate_rows = _insert_topics_bulk(conn, interview_id, topics)
         conn.commit()
         conn.close()
+        # AI cache hydration is best-effort and not needed for the response; run it in the background.
+        _hydrate_topics_ai_async(position, hydrate_rows)
         return jsonify({'ids': topic_ids, 'topics': topics, 'message': f'{len(topics)} common topics added successfully'}), 201
-    
+
     # Add single topic
-    if USE_POSTGRESQL:
-        cursor = db_execute(conn, '''
-            INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        ''', (interview_id, topic_name, data.get('category_name'), data.get('priority', 'medium'), 
-              data.get('notes', '')))
-        result = db_fetchone(cursor)
-        topic_id = result['id'] if result else None
-        if topic_id:
-            _hydrate_topic_ai_from_cache(conn, topic_id, position, topic_name, data.get('category_name'))
-        cursor.close()
-    else:
-        cursor = db_execute(conn, '''
-            INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (interview_id, topic_name, data.get('category_name'), data.get('priority', 'medium'), 
-              data.get('notes', '')))
-        topic_id = db_lastrowid(cursor, conn)
-        if topic_id:
-            _hydrate_topic_ai_from_cache(conn, topic_id, position, topic_name, data.get('category_name'))
+    topic_id = db_execute_returning_id(conn, '''
+        INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (interview_id, topic_name, data.get('category_name'), data.get('priority', 'medium'),
+          data.get('notes', '')))
     conn.commit()
     conn.close()
+    if topic_id:
+        _hydrate_topics_ai_async(position, [(topic_id, topic_name, data.get('category_name'))])
     return jsonify({'id': topic_id, 'message': 'Topic added successfully'}), 201
 
 @app.route('/api/topics/<int:topic_id>', methods=['PUT'])
 def update_topic(topic_id):
     data = request.json
-    conn = get_db()
-    
-    # Get existing topic to preserve fields not being updated
-    cursor = db_execute(conn, 'SELECT * FROM topics WHERE id = ?', (topic_id,))
-    existing = db_fetchone(cursor)
-    if USE_POSTGRESQL:
-        cursor.close()
-    if not existing:
-        conn.close()
-        return jsonify({'error': 'Topic not found'}), 404
-    
-    existing_dict = dict(existing)
-    
-    # Update only provided fields, keep existing values for others
-    topic_name = data.get('topic_name', existing_dict.get('topic_name'))
-    priority = data.get('priority', existing_dict.get('priority'))
-    status = data.get('status', existing_dict.get('status'))
-    notes = data.get('notes', existing_dict.get('notes'))
-    ai_guidance = data.get('ai_guidance', existing_dict.get('ai_guidance'))
-    
-    if USE_POSTGRESQL:
+    with closing(get_db()) as conn:
+        # One statement instead of SELECT-then-UPDATE: COALESCE keeps the
+        # stored value for any field the client didn't send, and rowcount
+        # doubles as the existence check (0 rows touched -> 404).
         cursor = db_execute(conn, '''
-            UPDATE topics 
-            SET topic_name = %s, priority = %s, status = %s, notes = %s, ai_guidance = %s
-            WHERE id = %s
-        ''', (topic_name, priority, status, notes, ai_guidance, topic_id))
-        cursor.close()
-    else:
-        db_execute(conn, '''
-            UPDATE topics 
-            SET topic_name = ?, priority = ?, status = ?, notes = ?, ai_guidance = ?
+            UPDATE topics
+            SET topic_name = COALESCE(?, topic_name),
+                priority = COALESCE(?, priority),
+                status = COALESCE(?, status),
+                notes = COALESCE(?, notes),
+                ai_guidance = COALESCE(?, ai_guidance)
             WHERE id = ?
-        ''', (topic_name, priority, status, notes, ai_guidance, topic_id))
-    conn.commit()
-    conn.close()
+        ''', (data.get('topic_name'), data.get('priority'), data.get('status'),
+              data.get('notes'), data.get('ai_guidance'), topic_id))
+        updated = cursor.rowcount
+        if USE_POSTGRESQL:
+            cursor.close()
+        conn.commit()
+    if not updated:
+        return jsonify({'error': 'Topic not found'}), 404
     return jsonify({'message': 'Topic updated successfully'})
 
 @app.route('/api/topics/<int:topic_id>', methods=['DELETE'])
 def delete_topic(topic_id):
-    conn = get_db()
-    cursor = db_execute(conn, 'DELETE FROM topics WHERE id = ?', (topic_id,))
-    if USE_POSTGRESQL:
-        cursor.close()
-    conn.commit()
-    conn.close()
+    with closing(get_db()) as conn:
+        cursor = db_execute(conn, 'DELETE FROM topics WHERE id = ?', (topic_id,))
+        deleted = cursor.rowcount
+        if USE_POSTGRESQL:
+            cursor.close()
+        conn.commit()
+    if not deleted:
+        return jsonify({'error': 'Topic not found'}), 404
     return jsonify({'message': 'Topic deleted successfully'})
 
 @app.route('/api/interviews/<int:interview_id>/refresh-topics', methods=['POST'])
 def refresh_topics(interview_id):
     """Refresh topics for an interview from topics.json - only updates categorized topics, preserves uncategorized"""
     conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
+    # Only position is used from the row; don't ship every column for a check.
+    cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (interview_id,))
     interview = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
@@ -3594,67 +4708,112 @@ def refresh_topics(interview_id):
     position = dict(interview).get('position', 'Data Scientist')
 
     # Generate new topics from topics.json
-    topics = generate_common_topics(position)
-    topic_ids = []
-    for topic in topics:
-        if USE_POSTGRESQL:
-            cursor = db_execute(conn, '''
-                INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            ''', (interview_id, topic['name'], topic.get('category', None), 
-                  topic.get('priority', 'medium'), topic.get('notes', '')))
-            result = db_fetchone(cursor)
-            new_id = result['id'] if result else None
-            topic_ids.append(new_id)
-            if new_id:
-                _hydrate_topic_ai_from_cache(conn, new_id, position, topic['name'], topic.get('category', None))
-            cursor.close()
-        else:
-            cursor = db_execute(conn, '''
-                INSERT INTO topics (interview_id, topic_name, category_name, priority, notes)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interview_id, topic['name'], topic.get('category', None), 
-                  topic.get('priority', 'medium'), topic.get('notes', '')))
-            new_id = db_lastrowid(cursor, conn)
-            topic_ids.append(new_id)
-            if new_id:
-                _hydrate_topic_ai_from_cache(conn, new_id, position, topic['name'], topic.get('category', None))
-    
+    force = str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
+    topics = generate_common_topics(position, force=force)
+    topic_ids, hydrate_rows = _insert_topics_bulk(conn, interview_id, topics)
+
     conn.commit()
     conn.close()
+    # AI cache hydration is best-effort and not needed for the response; run it in the background.
+    _hydrate_topics_ai_async(position, hydrate_rows)
     return jsonify({'ids': topic_ids, 'topics': topics, 'message': f'{len(topics)} topics refreshed from topics.json'}), 200
 
+# AI prompt templates. Built once at import time; the request path only fills in
+# the per-topic placeholders via format_map.
+_GUIDANCE_PROMPT_TEMPLATE = """You are an expert interview preparation coach specializing in {position} roles. Provide comprehensive, interview-focused guidance for: {topic_name}{parent_context}
+
+For this topic, break it down into specific, actionable learning points that are commonly tested in interviews. For each point, include:
+
+1. **Core Concept**: What is it? (1-2 sentences)
+2. **Interview Focus**: What specific aspects are typically tested? (common questions, problem types, edge cases)
+3. **Practical Application**: How is this used in real work? (examples, use cases)
+4. **Key Details to Know**: Important nuances, gotchas, or advanced points
+
+Structure your response as:
+- Start with a title line: **Topic:** {topic_name}
+- Then a short **Where this fits** section (2-4 bullets) that explicitly references the topic path (if provided) and calls out key prerequisites.
+- Use **bold** for subtopic names
+- Use bullet points for details under each subtopic
+- Be specific and actionable - focus on what candidates actually need to know
+- Include concrete examples when helpful
+- Prioritize interview-relevant information over theoretical depth
+
+Keep it concise but comprehensive - aim for 3-5 main subtopics with 2-4 key points each. Focus on practical knowledge that helps someone prepare effectively for interviews."""
+
+# One shared message dict: the SDK only reads it, so both guidance routes can
+# hand Groq the same object instead of allocating a fresh 400-char pair per call.
+_GUIDANCE_SYSTEM_MSG = {"role": "system", "content": "You are an expert interview preparation coach with deep knowledge of technical interviews. Your guidance is practical, interview-focused, and actionable. You break down complex topics into learnable components, emphasize what's actually tested, and provide concrete examples. You use clear formatting with bold headers and bullet points."}
+
+# Static rules go in the system message (one shared string, byte-identical
+# across calls so provider prompt-prefix caches can hit); only the short
+# dynamic tail below is formatted per request. Same split as the other
+# _*_RULES constants.
+_STUDY_NOTES_RULES = """You are an expert interview preparation coach specializing in Data Scientist interviews.
+
+You are compiling STUDY NOTES for one topic. The notes must be concise, structured, and easy to review quickly.
+
+Write study notes in Markdown with these sections (use these exact headings):
+## Summary (5 bullets max)
+## Key concepts
+## Common interview questions (with brief answers)
+## Flashcards (Q/A)
+## Pitfalls & gotchas
+## Mini cheat-sheet (syntax / patterns)
+## Practice (3 tasks: easy/medium/hard)
+
+Rules:
+- Tailor to Data Scientist expectations (pandas/pyarrow examples ok; Spark only if relevant).
+- Avoid fluff. Prefer concrete examples and decision tradeoffs.
+- In **Flashcards (Q/A)**, produce the requested number of cards ordered from EASY → HARD. Use bullets in exactly this format:
+  - Q: ...
+    A: ...
+-    Difficulty: Easy|Medium|Hard
+- Every card MUST include an answer (no blank A lines). If the question is ambiguous, write the most likely concise interview-style answer and note assumptions in 1 sentence.
+- If the input guidance is missing something critical, infer reasonable details but keep it brief."""
+
+_STUDY_NOTES_DYNAMIC_TEMPLATE = """Produce {flashcards_count} flashcards.
+
+Topic path: {full_topic_path}
+
+User-provided notes/material (may be empty, treat as authoritative if present):
+{user_material}
+
+Input guidance (may include extra detail):
+{existing_guidance}"""
+
 @app.route('/api/topics/<int:topic_id>/ai-guidance', methods=['POST'])
 def generate_ai_guidance(topic_id):
     """Generate AI-powered study guidance for a topic based on the position"""
     data = request.get_json(silent=True) or {}
     force = bool(data.get('force')) or str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
     conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM topics WHERE id = ?', (topic_id,))
+    # Only fetch the columns we actually use; ai_guidance/ai_notes can be multi-KB markdown
+    # and SELECT * ships (and parses) all of it on every call.
+    cursor = db_execute(conn, 'SELECT interview_id, topic_name, category_name, ai_guidance FROM topics WHERE id = ?', (topic_id,))
     topic = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
     if not topic:
         conn.close()
         return jsonify({'error': 'Topic not found'}), 404
-    
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (dict(topic)['interview_id'],))
+
+    # Convert the rows once; dict() re-walks the column descriptions per call.
+    topic_d = dict(topic)
+    cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (topic_d['interview_id'],))
     interview = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
     if not interview:
         conn.close()
         return jsonify({'error': 'Study material not found'}), 404
-    
-    conn.close()
-    
+
     position = dict(interview).get('position', 'Data Scientist')
-    topic_name = dict(topic).get('topic_name', '')
-    category_name = dict(topic).get('category_name')
-    existing_ai_guidance = dict(topic).get('ai_guidance')
+    topic_name = topic_d.get('topic_name', '')
+    category_name = topic_d.get('category_name')
+    existing_ai_guidance = topic_d.get('ai_guidance')
     # If we already have guidance saved for this topic, return it (unless forced)
     if existing_ai_guidance and not force:
+        conn.close()
         return jsonify({'ai_guidance': existing_ai_guidance, 'message': 'Using cached AI guidance'})
 
     parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
@@ -3662,58 +4821,46 @@ def generate_ai_guidance(topic_id):
     full_topic_path = f"{parent_path_display} → {topic_name}" if parent_path_display else topic_name
     parent_context = f"\nTopic path: {full_topic_path}\n" if full_topic_path else ""
 
-    # Global cache: reuse across interviews when possible (unless forced)
+    # Global cache: reuse across interviews when possible (unless forced).
+    # The lookup + topic update run as one combined statement on the connection
+    # we already hold, instead of ~3 extra connections on every cache hit.
     if not force:
         # Use raw " > " path for a stable key (matches topics.json storage), plus the leaf topic
         topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
-        cached = _get_cached_ai_guidance(position, topic_name, topic_path_key_source)
+        cached = _apply_cached_ai_guidance(conn, topic_id, position, topic_name, topic_path_key_source)
         if cached:
-            _save_ai_guidance(topic_id, cached)
+            conn.close()
             return jsonify({'ai_guidance': cached, 'message': 'Using global cached AI guidance'})
+    conn.close()
     
-    prompt = f"""You are an expert interview preparation coach specializing in {position} roles. Provide comprehensive, interview-focused guidance for: {topic_name}{parent_context}
-
-For this topic, break it down into specific, actionable learning points that are commonly tested in interviews. For each point, include:
-
-1. **Core Concept**: What is it? (1-2 sentences)
-2. **Interview Focus**: What specific aspects are typically tested? (common questions, problem types, edge cases)
-3. **Practical Application**: How is this used in real work? (examples, use cases)
-4. **Key Details to Know**: Important nuances, gotchas, or advanced points
-
-Structure your response as:
-- Start with a title line: **Topic:** {topic_name}
-- Then a short **Where this fits** section (2-4 bullets) that explicitly references the topic path (if provided) and calls out key prerequisites.
-- Use **bold** for subtopic names
-- Use bullet points for details under each subtopic
-- Be specific and actionable - focus on what candidates actually need to know
-- Include concrete examples when helpful
-- Prioritize interview-relevant information over theoretical depth
-
-Keep it concise but comprehensive - aim for 3-5 main subtopics with 2-4 key points each. Focus on practical knowledge that helps someone prepare effectively for interviews."""
+    prompt = _GUIDANCE_PROMPT_TEMPLATE.format_map({
+        'position': position,
+        'topic_name': topic_name,
+        'parent_context': parent_context,
+    })
 
     # Try Groq first (fastest, good free tier)
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
     if groq_key and Groq:
         try:
-            client = Groq(api_key=groq_key)
+            client = _get_groq_client()
             response = client.chat.completions.create(
                 model="llama-3.1-8b-instant",  # Fast and free
                 messages=[
-                    {"role": "system", "content": "You are an expert interview preparation coach with deep knowledge of technical interviews. Your guidance is practical, interview-focused, and actionable. You break down complex topics into learnable components, emphasize what's actually tested, and provide concrete examples. You use clear formatting with bold headers and bullet points."},
+                    _GUIDANCE_SYSTEM_MSG,
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
                 temperature=0.7
             )
             ai_guidance = response.choices[0].message.content.strip()
-            _save_ai_guidance(topic_id, ai_guidance)
             topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
-            _upsert_cached_ai_guidance(position, topic_name, topic_path_key_source, ai_guidance, model_provider='groq', model_name="llama-3.1-8b-instant")
+            # Persist off the request path; the reply doesn't need the writes.
+            AI_WRITER.submit(_persist_guidance, topic_id, position, topic_name, topic_path_key_source, ai_guidance, 'groq', "llama-3.1-8b-instant")
             return jsonify({'ai_guidance': ai_guidance, 'message': 'AI guidance generated successfully'})
         except Exception as e:
             # Log the error for debugging
             error_msg = str(e)
-            import traceback
             print(f"Groq API error: {error_msg}")
             print(traceback.format_exc())
             # Return the error so we can see what's wrong
@@ -3723,10 +4870,10 @@ Keep it concise but comprehensive - aim for 3-5 main subtopics with 2-4 key poin
     gemini_key = os.getenv('GOOGLE_API_KEY')
     if gemini_key and genai:
         try:
-            genai.configure(api_key=gemini_key)
-            model = genai.GenerativeModel('gemini-pro')
+            model = _get_gemini_model()
             full_prompt = f"You are an expert interview preparation coach specializing in technical roles. Provide comprehensive, interview-focused guidance with clear structure and practical examples.\n\n{prompt}"
-            response = model.generate_content(
+            response = _gemini_generate_text(
+                model,
                 full_prompt,
                 generation_config={
                     'max_output_tokens': 400,
@@ -3734,16 +4881,15 @@ Keep it concise but comprehensive - aim for 3-5 main subtopics with 2-4 key poin
                 }
             )
             ai_guidance = response.text.strip()
-            _save_ai_guidance(topic_id, ai_guidance)
             topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
-            _upsert_cached_ai_guidance(position, topic_name, topic_path_key_source, ai_guidance, model_provider='gemini', model_name='gemini-pro')
+            AI_WRITER.submit(_persist_guidance, topic_id, position, topic_name, topic_path_key_source, ai_guidance, 'gemini', 'gemini-pro')
             return jsonify({'ai_guidance': ai_guidance, 'message': 'AI guidance generated successfully'})
         except Exception as e:
             # Fall through to error
             pass
     
     # No API keys configured or both failed
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
+    groq_key = os.getenv('GROQ_API_KEY')
     gemini_key = os.getenv('GOOGLE_API_KEY')
     
     error_msg = 'Failed to generate AI guidance.'
@@ -3756,6 +4902,101 @@ Keep it concise but comprehensive - aim for 3-5 main subtopics with 2-4 key poin
     
     return jsonify({'error': error_msg}), 500
 
+def _sse_event(payload):
+    """Format a dict as one Server-Sent Events message (JSON keeps newlines safe)."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+@app.route('/api/topics/<int:topic_id>/ai-guidance/stream', methods=['GET', 'POST'])
+def stream_ai_guidance(topic_id):
+    """Stream AI guidance for a topic as Server-Sent Events.
+
+    Same lookup and caching rules as generate_ai_guidance, but Groq deltas are
+    forwarded to the client as they arrive instead of holding the worker (and
+    the user) for the full 1-3s completion. Cache hits replay as a single
+    event. The plain POST endpoint above stays for non-SSE callers.
+    """
+    force = str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
+    conn = get_db()
+    cursor = db_execute(conn, 'SELECT interview_id, topic_name, category_name, ai_guidance FROM topics WHERE id = ?', (topic_id,))
+    topic = db_fetchone(cursor)
+    if USE_POSTGRESQL:
+        cursor.close()
+    if not topic:
+        conn.close()
+        return jsonify({'error': 'Topic not found'}), 404
+
+    topic_d = dict(topic)
+    cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (topic_d['interview_id'],))
+    interview = db_fetchone(cursor)
+    if USE_POSTGRESQL:
+        cursor.close()
+    if not interview:
+        conn.close()
+        return jsonify({'error': 'Study material not found'}), 404
+
+    position = dict(interview).get('position', 'Data Scientist')
+    topic_name = topic_d.get('topic_name', '')
+    category_name = topic_d.get('category_name')
+
+    parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
+    parent_path_display = parent_path_raw.replace(' > ', ' → ') if parent_path_raw else None
+    full_topic_path = f"{parent_path_display} → {topic_name}" if parent_path_display else topic_name
+    parent_context = f"\nTopic path: {full_topic_path}\n" if full_topic_path else ""
+    topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
+
+    cached = None
+    if not force:
+        cached = topic_d.get('ai_guidance') or _apply_cached_ai_guidance(conn, topic_id, position, topic_name, topic_path_key_source)
+    conn.close()
+    if cached:
+        def replay():
+            yield _sse_event({'delta': cached})
+            yield _sse_event({'done': True, 'cached': True})
+        return Response(replay(), mimetype='text/event-stream')
+
+    groq_key = os.getenv('GROQ_API_KEY')
+    if not groq_key or not Groq:
+        return jsonify({'error': 'Streaming requires a configured GROQ_API_KEY.'}), 500
+
+    prompt = _GUIDANCE_PROMPT_TEMPLATE.format_map({
+        'position': position,
+        'topic_name': topic_name,
+        'parent_context': parent_context,
+    })
+    client = _get_groq_client()
+
+    def generate():
+        pieces = []
+        try:
+            stream = client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[
+                    _GUIDANCE_SYSTEM_MSG,
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    pieces.append(delta)
+                    yield _sse_event({'delta': delta})
+        except Exception as e:
+            print(f"Groq API error: {e}")
+            yield _sse_event({'error': f'Groq API error: {e}'})
+            return
+        ai_guidance = ''.join(pieces).strip()
+        if ai_guidance:
+            # Persist on AI_WRITER so the final SSE frame isn't held for writes.
+            AI_WRITER.submit(_persist_guidance, topic_id, position, topic_name, topic_path_key_source, ai_guidance, 'groq', "llama-3.1-8b-instant")
+        yield _sse_event({'done': True})
+
+    # X-Accel-Buffering stops nginx-style proxies from buffering the stream.
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def _save_ai_guidance(topic_id, ai_guidance):
     """Helper function to save AI guidance to database"""
     conn = get_db()
@@ -3774,6 +5015,255 @@ def _save_ai_notes(topic_id, ai_notes):
     conn.commit()
     conn.close()
 
+# Post-response persistence pool: after an AI generation the topic UPDATE and
+# cache upsert aren't needed for the HTTP reply, so handlers submit them here
+# and return immediately. Two workers bound the write concurrency; a shared
+# pool also avoids per-request thread churn (cf. _hydrate_topics_ai_async).
+AI_WRITER = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ai-writer')
+
+def _persist_guidance(topic_id, position, topic_name, topic_path, ai_guidance, model_provider=None, model_name=None):
+    """Save generated guidance to the topic row and the global cache in one transaction.
+
+    Guidance counterpart of _persist_notes: fuses _save_ai_guidance +
+    _upsert_cached_ai_guidance into one connection and a single commit.
+    Runs on AI_WRITER, so failures must not propagate to a request.
+    """
+    if not ai_guidance:
+        return
+    try:
+        conn = get_db()
+        try:
+            position_key = _normalize_cache_key(position)
+            topic_key = _normalize_cache_key(topic_name)
+            topic_path_key = _normalize_cache_key(topic_path)
+            updated_at = datetime.now(timezone.utc).isoformat()
+
+            cursor = db_execute(conn, 'UPDATE topics SET ai_guidance = ? WHERE id = ?', (ai_guidance, topic_id))
+            if USE_POSTGRESQL:
+                cursor.close()
+            try:
+                if USE_POSTGRESQL:
+                    cursor = db_execute(conn, '''
+                        INSERT INTO ai_guidance_cache (position_key, topic_key, topic_path_key, ai_guidance, model_provider, model_name, updated_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (position_key, topic_key, topic_path_key)
+                        DO UPDATE SET
+                            ai_guidance = EXCLUDED.ai_guidance,
+                            model_provider = EXCLUDED.model_provider,
+                            model_name = EXCLUDED.model_name,
+                            updated_at = EXCLUDED.updated_at
+                    ''', (position_key, topic_key, topic_path_key, ai_guidance, model_provider, model_name, updated_at))
+                    cursor.close()
+                else:
+                    db_execute(conn, '''
+                        INSERT INTO ai_guidance_cache (position_key, topic_key, topic_path_key, ai_guidance, model_provider, model_name, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(position_key, topic_key, topic_path_key)
+                        DO UPDATE SET
+                            ai_guidance = excluded.ai_guidance,
+                            model_provider = excluded.model_provider,
+                            model_name = excluded.model_name,
+                            updated_at = excluded.updated_at
+                    ''', (position_key, topic_key, topic_path_key, ai_guidance, model_provider, model_name, updated_at))
+            except sqlite3.OperationalError as e:
+                # Cache table missing: still persist the topic update.
+                if 'no such table' not in str(e).lower():
+                    raise
+
+            conn.commit()
+        finally:
+            conn.close()
+        _mem_cache_put(_AI_GUIDANCE_MEM_CACHE, (position_key, topic_key, topic_path_key), ai_guidance)
+    except Exception:
+        # Best-effort: the client already has the generated text.
+        pass
+
+def _persist_notes(topic_id, position, topic_name, topic_path, notes_markdown, model_provider=None, model_name=None):
+    """Save generated notes to the topic row and the global cache in one transaction.
+
+    Fuses _save_ai_notes + _upsert_cached_study_notes: one connection, both
+    statements, a single commit — instead of two connection acquires and two
+    round-trips on the notes response path.
+    Runs on AI_WRITER, so failures must not propagate to a request.
+    """
+    if not notes_markdown:
+        return
+    try:
+        conn = get_db()
+        try:
+            position_key = _normalize_cache_key(position)
+            topic_key = _normalize_cache_key(topic_name)
+            topic_path_key = _normalize_cache_key(topic_path)
+            updated_at = datetime.now(timezone.utc).isoformat()
+
+            cursor = db_execute(conn, 'UPDATE topics SET ai_notes = ? WHERE id = ?', (notes_markdown, topic_id))
+            if USE_POSTGRESQL:
+                cursor.close()
+            try:
+                if USE_POSTGRESQL:
+                    cursor = db_execute(conn, '''
+                        INSERT INTO study_notes_cache (position_key, topic_key, topic_path_key, notes_markdown, model_provider, model_name, updated_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (position_key, topic_key, topic_path_key)
+                        DO UPDATE SET
+                            notes_markdown = EXCLUDED.notes_markdown,
+                            model_provider = EXCLUDED.model_provider,
+                            model_name = EXCLUDED.model_name,
+                            updated_at = EXCLUDED.updated_at
+                    ''', (position_key, topic_key, topic_path_key, notes_markdown, model_provider, model_name, updated_at))
+                    cursor.close()
+                else:
+                    db_execute(conn, '''
+                        INSERT INTO study_notes_cache (position_key, topic_key, topic_path_key, notes_markdown, model_provider, model_name, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(position_key, topic_key, topic_path_key)
+                        DO UPDATE SET
+                            notes_markdown = excluded.notes_markdown,
+                            model_provider = excluded.model_provider,
+                            model_name = excluded.model_name,
+                            updated_at = excluded.updated_at
+                    ''', (position_key, topic_key, topic_path_key, notes_markdown, model_provider, model_name, updated_at))
+            except sqlite3.OperationalError as e:
+                # Cache table missing: still persist the topic update.
+                if 'no such table' not in str(e).lower():
+                    raise
+
+            conn.commit()
+        finally:
+            conn.close()
+        _mem_cache_put(_STUDY_NOTES_MEM_CACHE, (position_key, topic_key, topic_path_key), notes_markdown)
+    except Exception:
+        # Best-effort: the client already has the generated text.
+        pass
+
+# Groq rate limiting: cap concurrent calls per process and retry transient
+# 429s with a short backoff instead of immediately spilling to the slower
+# Gemini fallback (which wastes the Groq call and degrades latency).
+_GROQ_SEM = threading.Semaphore(int(os.getenv('GROQ_MAX_CONCURRENCY', '2')))
+_GROQ_MAX_ATTEMPTS = 3
+
+def _is_groq_rate_limit(e):
+    """True if an exception looks like a Groq 429/rate-limit error."""
+    if GroqRateLimitError is not None and isinstance(e, GroqRateLimitError):
+        return True
+    msg = str(e).lower()
+    return '429' in msg or 'rate limit' in msg or 'rate_limit' in msg
+
+async def _async_generate_notes_markdown(prompt, max_tokens=700):
+    """
+    Generate study-notes markdown via the async provider clients.
+
+    Default behavior: await Groq, fall back to Gemini on failure.
+    With AI_NOTES_FANOUT=1 and both providers configured, both calls are issued
+    concurrently and the first successful response wins (the loser is cancelled).
+    Returns (provider, model_name, markdown); (None, None, None) when no
+    provider is configured. Raises if every configured provider fails.
+    """
+    groq_key = os.getenv('GROQ_API_KEY')
+    gemini_key = os.getenv('GOOGLE_API_KEY')
+    use_groq = bool(groq_key and (AsyncGroq is not None or Groq is not None))
+    use_gemini = bool(gemini_key and genai is not None)
+    if not use_groq and not use_gemini:
+        return (None, None, None)
+
+    async def _call_groq_once():
+        if AsyncGroq is not None:
+            client = AsyncGroq(api_key=groq_key, timeout=_llm_timeout())
+            response = await client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[
+                    _NOTES_SYSTEM_MSG,
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.4
+            )
+        else:
+            # Old groq versions without AsyncGroq: run the sync client off-loop.
+            def _sync():
+                client = _get_groq_client()
+                return client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[
+                        _NOTES_SYSTEM_MSG,
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.4
+                )
+            response = await asyncio.to_thread(_sync)
+        return ('groq', 'llama-3.1-8b-instant', response.choices[0].message.content.strip())
+
+    async def _call_groq():
+        # Semaphore bounds concurrent Groq calls process-wide; acquire off-loop
+        # so a full semaphore doesn't block the event loop.
+        await asyncio.to_thread(_GROQ_SEM.acquire)
+        try:
+            for attempt in range(_GROQ_MAX_ATTEMPTS):
+                try:
+                    return await _call_groq_once()
+                except Exception as e:
+                    if attempt + 1 < _GROQ_MAX_ATTEMPTS and _is_groq_rate_limit(e):
+                        delay = min(8.0, 2.0 ** attempt)
+                        print(f"Groq rate-limited, retrying in {delay:.0f}s (attempt {attempt + 1}/{_GROQ_MAX_ATTEMPTS})")
+                        await asyncio.sleep(delay)
+                        continue
+                    raise
+        finally:
+            _GROQ_SEM.release()
+
+    async def _call_gemini():
+        model = _get_gemini_model()
+        # Gemini has no system role here; prepend the static rules instead.
+        full_prompt = f"{_STUDY_NOTES_RULES}\n\n{prompt}"
+        generation_config = {
+            'max_output_tokens': max_tokens,
+            'temperature': 0.4,
+        }
+        if hasattr(model, 'generate_content_async'):
+            response = await model.generate_content_async(full_prompt, generation_config=generation_config)
+        else:
+            response = await asyncio.to_thread(model.generate_content, full_prompt, generation_config=generation_config)
+        return ('gemini', 'gemini-pro', response.text.strip())
+
+    fanout = bool(_env_truthy('AI_NOTES_FANOUT', default=False)) and use_groq and use_gemini
+    if fanout:
+        tasks = [asyncio.ensure_future(_call_groq()), asyncio.ensure_future(_call_gemini())]
+        pending = set(tasks)
+        last_err = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        last_err = e
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_err or Exception('All AI providers failed')
+
+    last_err = None
+    if use_groq:
+        try:
+            return await _call_groq()
+        except Exception as e:
+            last_err = e
+            print(f"Groq API error (study notes): {e}")
+    if use_gemini:
+        try:
+            return await _call_gemini()
+        except Exception as e:
+            last_err = e
+    raise last_err or Exception('All AI providers failed')
+
+# In-flight dedup for note generation: concurrent requests for the same
+# normalized (position, topic, path) share one LLM call instead of each paying
+# a full 700-token round-trip (e.g. the same topic opened twice quickly).
+_NOTES_INFLIGHT = {}
+_NOTES_INFLIGHT_LOCK = threading.Lock()
+
 @app.route('/api/topics/<int:topic_id>/study-notes', methods=['POST'])
 def generate_study_notes(topic_id):
     """
@@ -3786,7 +5276,8 @@ def generate_study_notes(topic_id):
     force = bool(data.get('force')) or str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
 
     conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM topics WHERE id = ?', (topic_id,))
+    # Narrow column list: study notes only need these fields, not the full (wide) row.
+    cursor = db_execute(conn, 'SELECT interview_id, topic_name, category_name, ai_guidance, ai_notes, notes FROM topics WHERE id = ?', (topic_id,))
     topic = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
@@ -3794,7 +5285,9 @@ def generate_study_notes(topic_id):
         conn.close()
         return jsonify({'error': 'Topic not found'}), 404
 
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (dict(topic)['interview_id'],))
+    # Convert the row once; dict() re-walks the column descriptions per call.
+    topic_d = dict(topic)
+    cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (topic_d['interview_id'],))
     interview = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
@@ -3804,24 +5297,24 @@ def generate_study_notes(topic_id):
     conn.close()
 
     position = dict(interview).get('position', 'Data Scientist')
-    topic_name = dict(topic).get('topic_name', '')
-    category_name = dict(topic).get('category_name')
+    topic_name = topic_d.get('topic_name', '')
+    category_name = topic_d.get('category_name')
     parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
     topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
 
-    existing_notes = dict(topic).get('ai_notes')
+    existing_notes = topic_d.get('ai_notes')
     if existing_notes and not force:
-        return jsonify({'notes_markdown': existing_notes, 'message': 'Using cached study notes'})
+        return ojsonify({'notes_markdown': existing_notes, 'message': 'Using cached study notes'})
 
     if not force:
         cached_notes = _get_cached_study_notes(position, topic_name, topic_path_key_source)
         if cached_notes:
             _save_ai_notes(topic_id, cached_notes)
-            return jsonify({'notes_markdown': cached_notes, 'message': 'Using global cached study notes'})
+            return ojsonify({'notes_markdown': cached_notes, 'message': 'Using global cached study notes'})
 
     # We compile notes from existing guidance where possible
-    existing_guidance = dict(topic).get('ai_guidance')
-    user_material = dict(topic).get('notes') or ''
+    existing_guidance = topic_d.get('ai_guidance')
+    user_material = topic_d.get('notes') or ''
     if not existing_guidance:
         # Trigger guidance generation (respects global guidance cache unless forced)
         # We call the underlying logic by reusing the route function's behavior via a direct call.
@@ -3832,7 +5325,7 @@ def generate_study_notes(topic_id):
             existing_guidance = cached_guidance
             _save_ai_guidance(topic_id, cached_guidance)
 
-    if not existing_guidance and not (os.getenv('GROQ_API_KEY') or os.getenv('GOOGLE_API_KEY') or os.environ.get('GROQ_API_KEY')):
+    if not existing_guidance and not (os.getenv('GROQ_API_KEY') or os.getenv('GOOGLE_API_KEY')):
         return jsonify({'error': 'No AI API key configured. Set GROQ_API_KEY or GOOGLE_API_KEY, or generate guidance first.'}), 400
 
     # Build topic path display for context
@@ -3845,201 +5338,306 @@ def generate_study_notes(topic_id):
     except Exception:
         flashcards_count = 15
 
-    prompt = f"""You are an expert interview preparation coach specializing in Data Scientist interviews.
+    prompt = _STUDY_NOTES_DYNAMIC_TEMPLATE.format_map({
+        'full_topic_path': full_topic_path,
+        'user_material': user_material,
+        'existing_guidance': existing_guidance or '',
+        'flashcards_count': flashcards_count,
+    })
+    # Scale the output budget with the deck size instead of always paying for
+    # 700 tokens; latency and cost are linear in completion length.
+    notes_max_tokens = min(700, 120 + 35 * flashcards_count)
+
+    # Prefer Groq, then Gemini (similar to guidance), dispatched async so both
+    # providers can be raced when fan-out is enabled. The first request for a
+    # given key becomes the leader and runs the generation; concurrent
+    # duplicates wait on its Future and reuse the result.
+    inflight_key = (_normalize_cache_key(position), _normalize_cache_key(topic_name),
+                    _normalize_cache_key(topic_path_key_source))
+    with _NOTES_INFLIGHT_LOCK:
+        fut = _NOTES_INFLIGHT.get(inflight_key)
+        leader = fut is None
+        if leader:
+            fut = Future()
+            _NOTES_INFLIGHT[inflight_key] = fut
+    try:
+        if leader:
+            try:
+                result = asyncio.run(_async_generate_notes_markdown(prompt, max_tokens=notes_max_tokens))
+                fut.set_result(result)
+            except Exception as e:
+                fut.set_exception(e)
+                raise
+            finally:
+                with _NOTES_INFLIGHT_LOCK:
+                    _NOTES_INFLIGHT.pop(inflight_key, None)
+        else:
+            # Generous bound: the leader's own timeout/retries fire well before it.
+            result = fut.result(timeout=max(60.0, _llm_timeout() * 4))
+        provider, model_name, notes_markdown = result
+    except Exception as e:
+        error_msg = str(e)
+        print(f"AI API error (study notes): {error_msg}")
+        print(traceback.format_exc())
+        return jsonify({'error': f'AI API error: {error_msg}. Check server logs for details.'}), 500
 
-You are compiling STUDY NOTES for one topic. The notes must be concise, structured, and easy to review quickly.
+    if not notes_markdown:
+        return jsonify({'error': 'Failed to generate study notes. Configure GROQ_API_KEY or GOOGLE_API_KEY.'}), 500
 
-Topic path: {full_topic_path}
+    # Persist off the request path; the reply doesn't need the writes.
+    AI_WRITER.submit(_persist_notes, topic_id, position, topic_name, topic_path_key_source, notes_markdown, provider, model_name)
+    return ojsonify({'notes_markdown': notes_markdown, 'message': 'Study notes generated successfully'})
 
-User-provided notes/material (may be empty, treat as authoritative if present):
-{user_material}
+# Shared system message carrying the static rules; see _STUDY_NOTES_RULES.
+_NOTES_SYSTEM_MSG = {"role": "system", "content": _STUDY_NOTES_RULES}
 
-Input guidance (may include extra detail):
-{existing_guidance or ''}
+@app.route('/api/topics/<int:topic_id>/study-notes/stream', methods=['GET', 'POST'])
+def stream_study_notes(topic_id):
+    """Stream study-notes generation as Server-Sent Events.
 
-Write study notes in Markdown with these sections (use these exact headings):
-## Summary (5 bullets max)
-## Key concepts
-## Common interview questions (with brief answers)
-## Flashcards (Q/A)
-## Pitfalls & gotchas
-## Mini cheat-sheet (syntax / patterns)
-## Practice (3 tasks: easy/medium/hard)
+    Notes counterpart of stream_ai_guidance: same lookup and caching rules as
+    generate_study_notes, but provider deltas reach the client as they arrive
+    instead of holding the worker for the whole completion. Cache hits replay
+    as a single event; the accumulated markdown is persisted on AI_WRITER.
+    The plain POST endpoint above stays for non-SSE callers (and is the only
+    one that supports provider fan-out).
+    """
+    force = str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
+    with closing(get_db()) as conn:
+        cursor = db_execute(conn, 'SELECT interview_id, topic_name, category_name, ai_guidance, ai_notes, notes FROM topics WHERE id = ?', (topic_id,))
+        topic = db_fetchone(cursor)
+        if USE_POSTGRESQL:
+            cursor.close()
+        if not topic:
+            return jsonify({'error': 'Topic not found'}), 404
+        topic_d = dict(topic)
+        cursor = db_execute(conn, 'SELECT position FROM interviews WHERE id = ?', (topic_d['interview_id'],))
+        interview = db_fetchone(cursor)
+        if USE_POSTGRESQL:
+            cursor.close()
+        if not interview:
+            return jsonify({'error': 'Study material not found'}), 404
 
-Rules:
-- Tailor to Data Scientist expectations (pandas/pyarrow examples ok; Spark only if relevant).
-- Avoid fluff. Prefer concrete examples and decision tradeoffs.
-- In **Flashcards (Q/A)**, produce {flashcards_count} cards ordered from EASY → HARD. Use bullets in exactly this format:
-  - Q: ...
-    A: ...
--    Difficulty: Easy|Medium|Hard
-- Every card MUST include an answer (no blank A lines). If the question is ambiguous, write the most likely concise interview-style answer and note assumptions in 1 sentence.
-- If the input guidance is missing something critical, infer reasonable details but keep it brief."""
+    position = dict(interview).get('position', 'Data Scientist')
+    topic_name = topic_d.get('topic_name', '')
+    category_name = topic_d.get('category_name')
+    parent_path_raw = category_name.strip() if isinstance(category_name, str) and category_name.strip() else None
+    topic_path_key_source = f"{parent_path_raw} > {topic_name}" if parent_path_raw else topic_name
 
-    # Prefer Groq, then Gemini (similar to guidance)
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    if groq_key and Groq:
+    cached_notes = None
+    if not force:
+        cached_notes = topic_d.get('ai_notes') or _get_cached_study_notes(position, topic_name, topic_path_key_source)
+    if cached_notes:
+        if not topic_d.get('ai_notes'):
+            _save_ai_notes(topic_id, cached_notes)
+        def replay():
+            yield _sse_event({'delta': cached_notes})
+            yield _sse_event({'done': True, 'cached': True})
+        return Response(replay(), mimetype='text/event-stream')
+
+    existing_guidance = topic_d.get('ai_guidance')
+    if not existing_guidance:
+        cached_guidance = _get_cached_ai_guidance(position, topic_name, topic_path_key_source)
+        if cached_guidance:
+            existing_guidance = cached_guidance
+            _save_ai_guidance(topic_id, cached_guidance)
+
+    groq_key = os.getenv('GROQ_API_KEY')
+    if not groq_key or not Groq:
+        return jsonify({'error': 'Streaming requires a configured GROQ_API_KEY.'}), 500
+
+    parent_path_display = parent_path_raw.replace(' > ', ' → ') if parent_path_raw else None
+    full_topic_path = f"{parent_path_display} → {topic_name}" if parent_path_display else topic_name
+    try:
+        flashcards_count = int(get_setting('flashcards_count', '15') or 15)
+    except Exception:
+        flashcards_count = 15
+
+    prompt = _STUDY_NOTES_DYNAMIC_TEMPLATE.format_map({
+        'full_topic_path': full_topic_path,
+        'user_material': topic_d.get('notes') or '',
+        'existing_guidance': existing_guidance or '',
+        'flashcards_count': flashcards_count,
+    })
+    # Same adaptive output budget as the non-streaming route.
+    notes_max_tokens = min(700, 120 + 35 * flashcards_count)
+    client = _get_groq_client()
+
+    def generate():
+        pieces = []
         try:
-            client = Groq(api_key=groq_key)
-            response = client.chat.completions.create(
+            stream = client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[
-                    {"role": "system", "content": "You are an expert interview preparation coach. You write crisp, well-structured study notes in Markdown. You are concise and practical."},
+                    _NOTES_SYSTEM_MSG,
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=700,
-                temperature=0.4
+                max_tokens=notes_max_tokens,
+                temperature=0.4,
+                stream=True
             )
-            notes_markdown = response.choices[0].message.content.strip()
-            _save_ai_notes(topic_id, notes_markdown)
-            _upsert_cached_study_notes(position, topic_name, topic_path_key_source, notes_markdown, model_provider='groq', model_name="llama-3.1-8b-instant")
-            return jsonify({'notes_markdown': notes_markdown, 'message': 'Study notes generated successfully'})
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    pieces.append(delta)
+                    yield _sse_event({'delta': delta})
         except Exception as e:
-            error_msg = str(e)
-            import traceback
-            print(f"Groq API error (study notes): {error_msg}")
-            print(traceback.format_exc())
-            return jsonify({'error': f'Groq API error: {error_msg}. Check server logs for details.'}), 500
+            print(f"Groq API error (study notes stream): {e}")
+            yield _sse_event({'error': f'Groq API error: {e}'})
+            return
+        notes_markdown = ''.join(pieces).strip()
+        if notes_markdown:
+            # Persist on AI_WRITER so the final SSE frame isn't held for writes.
+            AI_WRITER.submit(_persist_notes, topic_id, position, topic_name, topic_path_key_source, notes_markdown, 'groq', 'llama-3.1-8b-instant')
+        yield _sse_event({'done': True})
 
-    gemini_key = os.getenv('GOOGLE_API_KEY')
-    if gemini_key and genai:
-        try:
-            genai.configure(api_key=gemini_key)
-            model = genai.GenerativeModel('gemini-pro')
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    'max_output_tokens': 700,
-                    'temperature': 0.4,
-                }
-            )
-            notes_markdown = response.text.strip()
-            _save_ai_notes(topic_id, notes_markdown)
-            _upsert_cached_study_notes(position, topic_name, topic_path_key_source, notes_markdown, model_provider='gemini', model_name='gemini-pro')
-            return jsonify({'notes_markdown': notes_markdown, 'message': 'Study notes generated successfully'})
-        except Exception:
-            pass
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-    return jsonify({'error': 'Failed to generate study notes. Configure GROQ_API_KEY or GOOGLE_API_KEY.'}), 500
+# Memoized parse of topics.json, keyed on file mtime so admin saves invalidate it.
+_TOPICS_FILE_CACHE = {'mtime': None, 'data': None}
 
 def load_default_topics():
     """Load default topics from topics.json file - supports recursive nesting"""
-    def process_node(node, path_parts):
-        """Recursively process a category/subcategory node"""
-        topics_list = []
-        node_name = node.get('name', '')
-        current_path = path_parts + [node_name] if node_name else path_parts
-        
-        # Process subcategories first (if any)
-        if 'subcategories' in node and node.get('subcategories'):
-            # Process each subcategory recursively
-            for subcat in node.get('subcategories', []):
-                topics_list.extend(process_node(subcat, current_path))
-        
-        # Also process direct topics (if any) - this handles cases where a node has both subcategories and topics
-        if 'topics' in node and node.get('topics'):
-            for i, topic_name in enumerate(node.get('topics', [])):
-                full_category = ' > '.join(current_path) if current_path else None
-                topics_list.append({
-                    'name': topic_name,
-                    'category': full_category,
-                    'priority': 'high' if i < 2 else 'medium'
-                })
-        
-        return topics_list
-    
     try:
-        with open('topics.json', 'r') as f:
-            data = json.load(f)
-            topics = []
-            
-            # Process each category
-            for category in data.get('categories', []):
-                category_name = category.get('name', '')
-                
-                # Process recursively - this handles both subcategories and direct topics
-                topics.extend(process_node(category, []))
-            
-            # Add uncategorized topics
-            for topic_name in data.get('uncategorized_topics', []):
-                topics.append({
-                    'name': topic_name,
-                    'category': None,
-                    'priority': 'medium'
-                })
-            return topics
+        mtime = os.stat('topics.json').st_mtime_ns
+    except OSError:
+        return []
+    if _TOPICS_FILE_CACHE['mtime'] == mtime:
+        # Shallow copy so callers can extend/trim without poisoning the cache.
+        return list(_TOPICS_FILE_CACHE['data'])
+
+    try:
+        with open('topics.json', 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        topics = []
+
+        # Iterative DFS with an explicit stack instead of recursion. Paths are
+        # tuples shared between siblings, so no per-node list copies. For each
+        # node, subcategory subtrees are emitted before its direct topics
+        # (same ordering as the old recursive walk).
+        stack = deque(('node', cat, ()) for cat in reversed(data.get('categories', [])))
+        while stack:
+            kind, node, path = stack.pop()
+            if kind == 'topics':
+                for i, topic_name in enumerate(node.get('topics') or []):
+                    # Interned so the handful of distinct category strings are
+                    # shared across all their topics (pointer-equality compares).
+                    full_category = sys.intern(' > '.join(path)) if path else None
+                    topics.append({
+                        'name': topic_name,
+                        'category': full_category,
+                        'priority': 'high' if i < 2 else 'medium'
+                    })
+                continue
+            node_name = node.get('name', '')
+            current_path = path + (node_name,) if node_name else path
+            stack.append(('topics', node, current_path))
+            for subcat in reversed(node.get('subcategories') or []):
+                stack.append(('node', subcat, current_path))
+
+        # Add uncategorized topics
+        for topic_name in data.get('uncategorized_topics', []):
+            topics.append({
+                'name': topic_name,
+                'category': None,
+                'priority': 'medium'
+            })
+        _TOPICS_FILE_CACHE['mtime'] = mtime
+        _TOPICS_FILE_CACHE['data'] = topics
+        return list(topics)
     except FileNotFoundError:
         # Fallback if file doesn't exist
         return []
-    except json.JSONDecodeError:
-        # Fallback if JSON is invalid
+    except ValueError:
+        # Fallback if JSON is invalid (orjson.JSONDecodeError is a ValueError too)
         return []
 
-def generate_common_topics(position):
+# Instruction/filler lines to drop from LLM topic-list responses, compiled once
+# so filtering is a single scan per line instead of 9 substring checks + .lower().
+_SKIP_PATTERNS_RE = re.compile(
+    r'format|example|provide|each category|each subtopic|'
+    r'hierarchical|organized by|main categories|technical skills',
+    re.IGNORECASE
+)
+
+# Subtopic-line cleanup in two anchored subs instead of the old
+# lstrip/strip/rstrip/strip chain (verified char-for-char equivalent):
+# leading bullet/number noise, then trailing asterisks/whitespace.
+_BULLET_STRIP_RE = re.compile(r'^[-•*0-9. ]+')
+_TRAIL_STARS_RE = re.compile(r'[\s*]+$')
+
+# AI-generated topic lists per position: identical positions shouldn't pay the
+# Groq round-trip again for 24h. Keyed by normalized position string.
+_COMMON_TOPICS_CACHE = {}
+_COMMON_TOPICS_TTL_SECONDS = 24 * 3600
+
+# Last-resort fallback topics (no API key AND topics.json missing/empty), built
+# once at import instead of 20+ dicts per call. Already grouped by category;
+# callers get dict copies so downstream mutation can't touch the constants.
+_FALLBACK_TOPICS = (
+        {'name': 'Python Data Structures (lists, dicts, sets, tuples)', 'priority': 'high', 'category': 'Core Programming'},
+        {'name': 'Python Control Flow & Functions', 'priority': 'high', 'category': 'Core Programming'},
+        {'name': 'List & Dict Comprehensions', 'priority': 'high', 'category': 'Core Programming'},
+        {'name': 'Python OOP (classes, __init__, methods)', 'priority': 'medium', 'category': 'Core Programming'},
+        {'name': 'groupby, agg, transform', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'Merging/joining data', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'Handling missing data', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'Datetime operations', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'Vectorization vs loops', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'Performance awareness (when pandas breaks)', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
+        {'name': 'SQL SELECT, WHERE, JOIN', 'priority': 'high', 'category': 'SQL'},
+        {'name': 'SQL GROUP BY, HAVING', 'priority': 'high', 'category': 'SQL'},
+        {'name': 'SQL Window Functions', 'priority': 'high', 'category': 'SQL'},
+        {'name': 'SQL Subqueries & CTEs', 'priority': 'medium', 'category': 'SQL'},
+        {'name': 'Descriptive Statistics', 'priority': 'high', 'category': 'Statistics'},
+        {'name': 'Probability Distributions', 'priority': 'high', 'category': 'Statistics'},
+        {'name': 'Hypothesis Testing & p-values', 'priority': 'high', 'category': 'Statistics'},
+        {'name': 'A/B Testing', 'priority': 'high', 'category': 'Statistics'},
+        {'name': 'Linear & Logistic Regression', 'priority': 'high', 'category': 'Machine Learning'},
+        {'name': 'Decision Trees', 'priority': 'high', 'category': 'Machine Learning'},
+        {'name': 'Random Forests', 'priority': 'high', 'category': 'Machine Learning'},
+        {'name': 'Gradient Boosting (XGBoost/LightGBM)', 'priority': 'high', 'category': 'Machine Learning'},
+        {'name': 'Model Evaluation Metrics', 'priority': 'high', 'category': 'Machine Learning'},
+)
+
+def generate_common_topics(position, force=False):
     """Generate common interview topics for a given position using AI"""
-    # Default granular technical topics based on common data science interview requirements
-    # Note: These are used as fallback if AI generation fails completely
-    default_topics = [
-            {'name': 'Python Data Structures (lists, dicts, sets, tuples)', 'priority': 'high', 'category': 'Core Programming'},
-            {'name': 'Python Control Flow & Functions', 'priority': 'high', 'category': 'Core Programming'},
-            {'name': 'List & Dict Comprehensions', 'priority': 'high', 'category': 'Core Programming'},
-            {'name': 'Python OOP (classes, __init__, methods)', 'priority': 'medium', 'category': 'Core Programming'},
-            {'name': 'groupby, agg, transform', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'Merging/joining data', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'Handling missing data', 'priority': 'high', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'Datetime operations', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'Vectorization vs loops', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'Performance awareness (when pandas breaks)', 'priority': 'medium', 'category': 'Data Manipulation & Analysis'},
-            {'name': 'SQL SELECT, WHERE, JOIN', 'priority': 'high', 'category': 'SQL'},
-            {'name': 'SQL GROUP BY, HAVING', 'priority': 'high', 'category': 'SQL'},
-            {'name': 'SQL Window Functions', 'priority': 'high', 'category': 'SQL'},
-            {'name': 'SQL Subqueries & CTEs', 'priority': 'medium', 'category': 'SQL'},
-            {'name': 'Descriptive Statistics', 'priority': 'high', 'category': 'Statistics'},
-            {'name': 'Probability Distributions', 'priority': 'high', 'category': 'Statistics'},
-            {'name': 'Hypothesis Testing & p-values', 'priority': 'high', 'category': 'Statistics'},
-            {'name': 'A/B Testing', 'priority': 'high', 'category': 'Statistics'},
-            {'name': 'Linear & Logistic Regression', 'priority': 'high', 'category': 'Machine Learning'},
-            {'name': 'Decision Trees', 'priority': 'high', 'category': 'Machine Learning'},
-            {'name': 'Random Forests', 'priority': 'high', 'category': 'Machine Learning'},
-            {'name': 'Gradient Boosting (XGBoost/LightGBM)', 'priority': 'high', 'category': 'Machine Learning'},
-            {'name': 'Model Evaluation Metrics', 'priority': 'high', 'category': 'Machine Learning'}
-    ]
-    
-    # First, try to load from topics.json
-    json_topics = load_default_topics()
-    print(f"Loaded {len(json_topics)} topics from topics.json")
-    if json_topics:
-        print(f"Sample topic: {json_topics[0] if json_topics else 'None'}")
-    
-    groq_key = os.environ.get('GROQ_API_KEY') or os.getenv('GROQ_API_KEY')
-    
+    groq_key = os.getenv('GROQ_API_KEY')
+
     if not groq_key or not Groq:
+        # First, try to load from topics.json (mtime-cached parse).
+        json_topics = load_default_topics()
+        print(f"Loaded {len(json_topics)} topics from topics.json")
+        if json_topics:
+            print(f"Sample topic: {json_topics[0]}")
         # Fallback: return topics from JSON file, or hardcoded if JSON is empty
         if json_topics:
             print("Returning topics from topics.json (no API key)")
             return json_topics  # Return all topics from JSON
         
-        # Fallback to hardcoded topics if JSON is empty
-        topics_by_category = {}
-        for topic in default_topics:
-            category = topic.get('category', 'Other')
-            if category not in topics_by_category:
-                topics_by_category[category] = []
-            topics_by_category[category].append({
-                'name': topic['name'],
-                'category': category,
-                'priority': topic.get('priority', 'medium')
-            })
-        
-        # Flatten back to list
-        result = []
-        for category, topics in topics_by_category.items():
-            result.extend(topics)
-        return result[:20]  # Return up to 20 topics
+        # Fallback to hardcoded topics if JSON is empty (already grouped by
+        # category, so no regroup/flatten pass is needed)
+        return [dict(t) for t in _FALLBACK_TOPICS[:20]]  # Return up to 20 topics
     
+    cache_key = ' '.join(str(position or '').strip().lower().split())
+    if not force:
+        cached = _COMMON_TOPICS_CACHE.get(cache_key)
+        if cached and (time.time() - cached[0]) < _COMMON_TOPICS_TTL_SECONDS:
+            return list(cached[1])
+        # Persisted cache survives restarts and is shared across workers.
+        try:
+            db_cached = _get_cached_common_topics(position)
+        except Exception:
+            db_cached = None
+        if db_cached:
+            _COMMON_TOPICS_CACHE[cache_key] = (time.time(), list(db_cached))
+            return db_cached
+
     try:
-        client = Groq(api_key=groq_key)
-        
+        client = _get_groq_client()
+
         prompt = f"""You are an expert technical recruiter and interview coach. For a {position} position, generate a comprehensive list of interview topics organized by category.
 
 Requirements:
@@ -4077,19 +5675,18 @@ Be specific: Instead of "Algorithms", use "Sorting algorithms (quicksort, merges
         # Parse the hierarchical response into categories and subtopics
         topics = []
         current_category = None
+        per_cat_count = {}  # topics emitted per category (priority assignment)
         lines = topics_text.split('\n')
         
         # Filter out instruction lines and find the actual content
         content_lines = []
-        skip_patterns = ['format', 'example', 'provide', 'each category', 'each subtopic', 
-                        'hierarchical', 'organized by', 'main categories', 'technical skills']
-        
+
         for line in lines:
             line = line.strip()
             if not line:
                 continue
             # Skip instruction lines
-            if any(pattern in line.lower() for pattern in skip_patterns):
+            if _SKIP_PATTERNS_RE.search(line):
                 continue
             # Skip lines that are too long (likely explanations)
             if len(line) > 150:
@@ -4106,13 +5703,11 @@ Be specific: Instead of "Algorithms", use "Sorting algorithms (quicksort, merges
             # 2. Doesn't start with bullet/number and next line is a bullet
             if line.endswith(':'):
                 is_category = True
-            elif not line.startswith('-') and not line.startswith('•') and not line.startswith('*'):
-                if line and not line[0].isdigit():
-                    # Check if next non-empty line is a bullet point
-                    if i + 1 < len(content_lines):
-                        next_line = content_lines[i + 1].strip()
-                        if next_line.startswith('-') or next_line.startswith('•') or next_line.startswith('*'):
-                            is_category = True
+            elif not line.startswith(('-', '•', '*')) and not line[0].isdigit():
+                # Check if the next line is a bullet point (content_lines are
+                # already stripped above)
+                if i + 1 < len(content_lines) and content_lines[i + 1].startswith(('-', '•', '*')):
+                    is_category = True
             
             if is_category:
                 # This is a category header
@@ -4120,87 +5715,98 @@ Be specific: Instead of "Algorithms", use "Sorting algorithms (quicksort, merges
                 # Remove asterisks and clean up
                 current_category = current_category.rstrip('*').strip()
                 # Validate: should be 2-80 characters, not too generic
-                if (current_category and 2 <= len(current_category) <= 80 and 
+                if (current_category and 2 <= len(current_category) <= 80 and
                     current_category.lower() not in ['category', 'topic', 'skill', 'subject']):
-                    # Category is valid, keep it
-                    pass
+                    # Valid: intern so every topic under it shares one string object
+                    current_category = sys.intern(current_category)
                 else:
                     current_category = None
             else:
                 # This is a subtopic
-                topic = line.lstrip('- •*0123456789. ').strip()
-                topic = topic.rstrip('*').strip()
+                topic = _TRAIL_STARS_RE.sub('', _BULLET_STRIP_RE.sub('', line))
                 # Only add if we have a valid category and topic
                 if topic and len(topic) > 1 and current_category:
-                    # Determine priority
-                    category_topics = [t for t in topics if t.get('category') == current_category]
-                    priority = 'high' if len(category_topics) < 2 else 'medium'
+                    # Determine priority: first two topics in a category are 'high'.
+                    # Counter lookup keeps this O(1) instead of rescanning the accumulator.
+                    n = per_cat_count.get(current_category, 0)
+                    priority = 'high' if n < 2 else 'medium'
+                    per_cat_count[current_category] = n + 1
                     topics.append({
                         'name': topic,
                         'category': current_category,
                         'priority': priority
                     })
         
+        # Only cache genuine LLM output; the fallbacks below come from topics.json,
+        # which has its own mtime-based cache and shouldn't be frozen for 24h.
+        if topics:
+            _COMMON_TOPICS_CACHE[cache_key] = (time.time(), list(topics))
+            try:
+                _upsert_cached_common_topics(position, topics)
+            except Exception:
+                pass
+
         # Ensure we have at least some topics
         if not topics:
             # Use topics from JSON file, or fallback to hardcoded
             topics = load_default_topics()
             if not topics:
                 # Fallback to hardcoded topics
-                for topic in default_topics:
-                    topics.append({
-                        'name': topic['name'],
-                        'category': topic.get('category'),
-                        'priority': topic.get('priority', 'medium')
-                    })
-        
+                topics = [dict(t) for t in _FALLBACK_TOPICS]
+
         return topics
-    
+
     except Exception as e:
         # Fallback on error - return granular default topics
-        return default_topics[:15]
+        return [dict(t) for t in _FALLBACK_TOPICS[:15]]
 
 @app.route('/api/interviews/<int:interview_id>/study-plan', methods=['GET'])
 def get_study_plan(interview_id):
     conn = get_db()
-    cursor = db_execute(conn, 'SELECT * FROM interviews WHERE id = ?', (interview_id,))
+    # Only interview_date is used below; skip the full-row fetch and dict copy.
+    cursor = db_execute(conn, 'SELECT interview_date FROM interviews WHERE id = ?', (interview_id,))
     interview = db_fetchone(cursor)
     if USE_POSTGRESQL:
         cursor.close()
     if not interview:
         conn.close()
         return jsonify({'error': 'Study material not found'}), 404
-    
-    cursor = db_execute(conn, 'SELECT * FROM topics WHERE interview_id = ? ORDER BY COALESCE(category_name, \'\'), priority DESC, topic_name ASC', 
+
+    cursor = db_execute(conn, 'SELECT * FROM topics WHERE interview_id = ? ORDER BY COALESCE(category_name, \'\'), priority DESC, topic_name ASC',
                          (interview_id,))
     topics = db_fetchall(cursor)
     if USE_POSTGRESQL:
         cursor.close()
     conn.close()
-    
-    interview_dict = dict(interview)
-    interview_date = interview_dict.get('interview_date')
-    
-    # Convert topics to list
+
+    interview_date = interview['interview_date']
+
+    # Convert topics and bucket by priority in a single pass (the three filter
+    # comprehensions re-walked the full list once per priority).
     topics_list = []
+    buckets = {'high': [], 'medium': [], 'low': []}
     for topic in topics:
-        topic_dict = dict(topic)
+        # RealDictCursor rows are already mutable dicts; only sqlite3.Row
+        # needs converting. Skipping the copy halves per-row allocations on PG.
+        topic_dict = topic if USE_POSTGRESQL else dict(topic)
         if topic_dict.get('topic_name') is None:
             topic_dict['topic_name'] = 'Untitled Topic'
+        # DB drivers hand back a fresh priority string per row; intern so the
+        # three distinct values are shared and bucket lookups hit by identity.
+        priority = topic_dict.get('priority')
+        if priority:
+            priority = sys.intern(priority)
+            topic_dict['priority'] = priority
         topics_list.append(topic_dict)
-    
-    # Group topics by priority
-    high_priority = [t for t in topics_list if t.get('priority') == 'high']
-    medium_priority = [t for t in topics_list if t.get('priority') == 'medium']
-    low_priority = [t for t in topics_list if t.get('priority') == 'low']
-    
-    return jsonify({
+        buckets.get(priority or 'medium', buckets['medium']).append(topic_dict)
+
+    return ojsonify({
         'interview_date': interview_date,
         'days_until': None,
         'topics': {
-            'high': high_priority,
-            'medium': medium_priority,
-            'low': low_priority,
+            'high': buckets['high'],
+            'medium': buckets['medium'],
+            'low': buckets['low'],
             'all': topics_list
         },
         'total': len(topics_list)
@@ -4213,16 +5819,21 @@ def generate_study_plan(topics, days_until):
     if not topics:
         return plan
     
-    # Sort topics by priority first, then by topic_name for consistency
+    # Sort topics by priority first, then by topic_name for consistency.
+    # Keys are precomputed once per topic (negated priority so a plain
+    # ascending sort orders high -> low) instead of a lambda per comparison.
     priority_order = {'high': 3, 'medium': 2, 'low': 1}
-    sorted_topics = sorted(
-        topics, 
-        key=lambda x: (
-            priority_order.get(x.get('priority', 'medium'), 2),  # Priority first
-            x.get('topic_name', '').lower()  # Then alphabetically for consistency
-        ),
-        reverse=True
-    )
+    keyed = [
+        (
+            -priority_order.get(t.get('priority', 'medium'), 2),  # Priority first
+            (t.get('topic_name') or '').lower(),  # Then alphabetically for consistency
+            i,
+            t
+        )
+        for i, t in enumerate(topics)
+    ]
+    keyed.sort()
+    sorted_topics = [k[3] for k in keyed]
     
     # Calculate distribution: spread topics evenly across available days
     # Reserve last day for review, so distribute across (days_until - 1) days
@@ -4233,17 +5844,17 @@ def generate_study_plan(topics, days_until):
     topics_per_day = max(1, total_topics // study_days)
     remainder = total_topics % study_days
     
-    current_date = datetime.now()
+    today_ordinal = datetime.now().toordinal()
     topic_index = 0
-    
+
     for day in range(study_days):
         if topic_index >= total_topics:
             break
-        
+
         # Distribute remainder topics across first few days
         day_topic_count = topics_per_day + (1 if day < remainder else 0)
-        
-        day_date = current_date + timedelta(days=day)
+
+        day_date = datetime.fromordinal(today_ordinal + day)
         day_topics = sorted_topics[topic_index:topic_index + day_topic_count]
         topic_index += day_topic_count
         
@@ -4273,46 +5884,19 @@ def ensure_db_initialized():
         conn.close()
         # Core tables exist, but still run init_db() to apply any new migrations
         # (CREATE TABLE IF NOT EXISTS / ALTER TABLE ... ADD COLUMN ...).
-        # Retry a few times in case the SQLite DB is briefly locked (Flask reloader).
-        last_err = None
-        for attempt in range(5):
-            try:
-                init_db()
-                last_err = None
-                break
-            except sqlite3.OperationalError as e:
-                last_err = e
-                if 'locked' in str(e).lower():
-                    time.sleep(0.2 * (attempt + 1))
-                    continue
-                raise
-        if last_err is not None:
-            raise last_err
+        # A briefly locked SQLite DB (Flask reloader) is waited out at C level
+        # by the connection's busy_timeout; no Python-side sleep/retry needed.
+        init_db()
         _db_initialized = True
         print("✅ Database tables already exist (migrations applied)")
     except Exception:
         # Tables don't exist, initialize them
         try:
-            # Same retry logic for first-time init
-            last_err = None
-            for attempt in range(5):
-                try:
-                    init_db()
-                    last_err = None
-                    break
-                except sqlite3.OperationalError as e:
-                    last_err = e
-                    if 'locked' in str(e).lower():
-                        time.sleep(0.2 * (attempt + 1))
-                        continue
-                    raise
-            if last_err is not None:
-                raise last_err
+            init_db()
             _db_initialized = True
             print("✅ Database initialized successfully")
         except Exception as e:
             print(f"⚠️  Failed to initialize database: {e}")
-            import traceback
             traceback.print_exc()
 
 # Initialize database on module load (works with gunicorn)
@@ -4325,7 +5909,15 @@ except Exception as e:
 @app.before_request
 def before_request():
     """Ensure database is initialized before handling requests"""
-    ensure_db_initialized()
+    if not _db_initialized:
+        ensure_db_initialized()
+    if _db_initialized:
+        # Init is done for the lifetime of this worker; take this hook off the
+        # per-request path entirely instead of re-checking the flag forever.
+        try:
+            app.before_request_funcs[None].remove(before_request)
+        except (KeyError, ValueError):
+            pass
 
 if __name__ == '__main__':
     # Use PORT from environment variable (Railway) or default to 5006 for local development